@@ -0,0 +1,61 @@
+# crawl_budget.py
+
+import threading
+import time
+
+# Monotonic time at which the whole gathering run has to stop, if any
+_run_deadline = None
+
+def start_run(seconds):
+    # Give the current run 'seconds' from now (0 or None = no deadline)
+    global _run_deadline
+    _run_deadline = time.monotonic() + seconds if seconds else None
+
+def run_deadline_passed():
+    return _run_deadline is not None and time.monotonic() >= _run_deadline
+
+class CrawlBudget:
+    # Limits on what a single professor's crawl may use: pages fetched, bytes
+    # downloaded and seconds spent, plus the run-level deadline. Each limit is
+    # disabled with 0/None. 'exhausted' names the first limit that ran out
+    # ('pages', 'bytes', 'time' or 'deadline'), or is None.
+
+    def __init__(self, pages=None, max_bytes=None, seconds=None):
+        self.pages = pages
+        self.max_bytes = max_bytes
+        self.seconds = seconds
+        self.pages_used = 0
+        self.bytes_used = 0
+        self.started = time.monotonic()
+        self.exhausted = None
+        self._lock = threading.Lock()
+
+    def take_page(self):
+        # Reserve one page; False once any limit has run out
+        with self._lock:
+            if self._check() is not None:
+                return False
+            if self.pages and self.pages_used >= self.pages:
+                self.exhausted = 'pages'
+                return False
+            self.pages_used += 1
+            return True
+
+    def add_bytes(self, size):
+        with self._lock:
+            self.bytes_used += size
+
+    def check(self):
+        # The limit that has run out, if any
+        with self._lock:
+            return self._check()
+
+    def _check(self):
+        if self.exhausted is None:
+            if self.max_bytes and self.bytes_used >= self.max_bytes:
+                self.exhausted = 'bytes'
+            elif self.seconds and time.monotonic() - self.started >= self.seconds:
+                self.exhausted = 'time'
+            elif run_deadline_passed():
+                self.exhausted = 'deadline'
+        return self.exhausted
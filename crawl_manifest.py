@@ -0,0 +1,85 @@
+# crawl_manifest.py
+
+import os
+import json
+import threading
+import datetime
+from url_utils import canonicalize_url
+import config
+
+# Incremental recrawl settings (optional in config.py)
+CRAWL_RECRAWL_AFTER_DAYS = getattr(config, 'CRAWL_RECRAWL_AFTER_DAYS', 7)  # Pages younger than this are not refetched (0 = always)
+
+MANIFEST_FILENAME = 'crawl_manifest.json'
+
+class CrawlManifest:
+    # Record of every URL crawled for one professor: which file it was saved
+    # to, the hash of its body, when it was fetched and last changed, how the
+    # fetch went and at which depth it was found. Entries are keyed by
+    # canonical URL and kept in <professor_dir>/crawl_manifest.json.
+
+    def __init__(self, professor_dir):
+        self.professor_dir = professor_dir
+        self.path = os.path.join(professor_dir, MANIFEST_FILENAME)
+        self._lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable crawl manifest {self.path}: {e}")
+
+    def entry(self, url):
+        with self._lock:
+            return self.entries.get(canonicalize_url(url))
+
+    def fresh_entry(self, url):
+        # The entry for 'url' when it was fetched recently enough to be reused
+        # without a request (and its file is still there), else None
+        if not CRAWL_RECRAWL_AFTER_DAYS:
+            return None
+        entry = self.entry(url)
+        if not entry or entry['status'] not in ('ok', 'skipped'):
+            return None
+        age = datetime.datetime.now().timestamp() - entry['fetched_at']
+        if age > CRAWL_RECRAWL_AFTER_DAYS * 86400:
+            return None
+        if entry['filename'] and not os.path.exists(os.path.join(self.professor_dir, entry['filename'])):
+            return None
+        return entry
+
+    def record(self, url, filename, content_hash, status, depth):
+        now = int(datetime.datetime.now().timestamp())
+        key = canonicalize_url(url)
+        with self._lock:
+            previous = self.entries.get(key) or {}
+            changed = content_hash is not None and content_hash != previous.get('content_hash')
+            self.entries[key] = {
+                'url': url,
+                'filename': filename,
+                'content_hash': content_hash if content_hash is not None else previous.get('content_hash'),
+                'fetched_at': now,
+                'changed_at': now if changed else previous.get('changed_at'),
+                'status': status,
+                'depth': depth,
+            }
+
+    def files(self):
+        # {filename: url} of every file the manifest owns
+        with self._lock:
+            return {entry['filename']: entry['url'] for entry in self.entries.values() if entry['filename']}
+
+    def changed_since(self, timestamp):
+        # Files whose content changed at or after 'timestamp'
+        with self._lock:
+            return sorted(entry['filename'] for entry in self.entries.values()
+                          if entry['filename'] and (entry['changed_at'] or 0) >= timestamp)
+
+    def save(self):
+        with self._lock:
+            data = json.dumps(self.entries, indent=4)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
@@ -2,20 +2,57 @@ import os
 import json
 import re
 import logging
+import sqlite3
+import time
 from datetime import datetime
 from collections import OrderedDict
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import zlib
 import unidecode  # For normalizing Unicode text
-
-def filter_professor_data(professor_name, project_directory):
-    # Configure logging
+import pubmed_xml
+import professor_store
+import relevance
+import publication_index
+import config
+
+# Batch filtering settings (optional in config.py)
+FILTER_WORKERS = getattr(config, 'FILTER_WORKERS', os.cpu_count() or 1)  # Processes used by --filter-all
+FILTER_COMMIT_EVERY = 50  # Professors marked as filtered per database transaction
+
+# Ranking of articles by relevance to the applicant's CV (optional in config.py)
+RANK_BY_CV = getattr(config, 'RANK_BY_CV', True)  # Rank against PROJECT_DIRECTORY/CV_simplified.txt when it exists
+ARTICLES_TOP_K = getattr(config, 'ARTICLES_TOP_K', 10)  # Articles kept for the prompts (0 = all)
+RECENCY_WEIGHT = getattr(config, 'RECENCY_WEIGHT', 0.3)  # Share of the ranking score given to recency
+
+# Near-duplicate detection of article titles
+TITLE_SIMILARITY_THRESHOLD = 0.8  # Jaccard similarity of title shingles for two records to be merged
+TITLE_SHINGLE_SIZE = 1  # Words per shingle
+MINHASH_BANDS = 16
+MINHASH_ROWS = 4  # Signature length is MINHASH_BANDS * MINHASH_ROWS
+MINHASH_PRIME = (1 << 61) - 1
+MAX_YEAR_GAP = 1  # Years apart two records of one paper may be dated (e.g. online vs. print)
+
+# Numbers and roman numerals in a title tell parts and volumes apart ("Part I" / "Part II")
+_number_re = re.compile(r'^(?:\d+|x{0,3}(?:ix|iv|v?i{0,3}))$')
+
+MAX_INITIALS = 3  # Longest given-name part of a family-first author ("Smith JAB") read as initials
+
+# Most trusted source first; used to pick the year when records disagree
+SOURCE_PRIORITY = ('crossref', 'entrez', 'scholarly', 'orcid')
+
+_minhash_params = [
+    (zlib.crc32(b'a%d' % i) | 1, zlib.crc32(b'b%d' % i)) for i in range(MINHASH_BANDS * MINHASH_ROWS)
+]
+
+def get_logger():
+    # Configure logging once per process
     logger = logging.getLogger('data_filtering')
+    if logger.handlers:
+        return logger
     logger.setLevel(logging.INFO)
     formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
 
-    # Remove existing handlers to prevent duplicate logs
-    if logger.hasHandlers():
-        logger.handlers.clear()
-
     # File handler for logging
     fh = logging.FileHandler('data_filtering.log')
     fh.setFormatter(formatter)
@@ -25,6 +62,79 @@ def filter_professor_data(professor_name, project_directory):
     ch = logging.StreamHandler()
     ch.setFormatter(formatter)
     logger.addHandler(ch)
+    return logger
+
+def filter_all(db_file, table_name, project_directory, workers=None):
+    # Filter every professor whose data gathering is complete and whose
+    # filtering is not, spread over a pool of processes. Finished professors
+    # are marked in the chronology table in batches, so an interrupted run
+    # keeps most of its progress.
+    logger = get_logger()
+    check_name_matching()
+    chronology_table = f"{table_name}_chronology"
+    conn = sqlite3.connect(db_file)
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT p."ID", p."Professor"
+        FROM "{table_name}" p
+        JOIN "{chronology_table}" c ON p."ID" = c."ID"
+        WHERE c."data_gathering_completed"
+          AND (c."data_filtering_completed" IS NULL OR NOT c."data_filtering_completed")
+    ''')
+    professors = cursor.fetchall()
+    logger.info(f"{len(professors)} professors left to filter")
+
+    start = time.monotonic()
+    filtered = 0
+    failed = 0
+    pending = []  # Filtered professors not yet marked in the database
+    with ProcessPoolExecutor(max_workers=workers or FILTER_WORKERS) as executor:
+        futures = {
+            executor.submit(_filter_timed, professor_name, project_directory): (professor_id, professor_name)
+            for professor_id, professor_name in professors
+        }
+        for future in as_completed(futures):
+            professor_id, professor_name = futures[future]
+            try:
+                completed, seconds = future.result()
+            except Exception as e:
+                logger.exception(f"Error filtering data for Professor ID {professor_id}: {e}")
+                failed += 1
+                continue
+            if not completed:
+                failed += 1
+                continue
+            logger.info(f"Filtered Professor ID {professor_id} ({professor_name}) in {seconds:.2f}s")
+            filtered += 1
+            pending.append(professor_id)
+            if len(pending) >= FILTER_COMMIT_EVERY:
+                _mark_filtered(conn, chronology_table, pending)
+                pending = []
+    _mark_filtered(conn, chronology_table, pending)
+
+    logger.info(f"Filtered {filtered} professors ({failed} failed) in {time.monotonic() - start:.1f}s")
+    conn.close()
+    return filtered
+
+def _filter_timed(professor_name, project_directory):
+    # Runs in a worker process; returns (completed, seconds)
+    start = time.monotonic()
+    completed = filter_professor_data(professor_name, project_directory)
+    return bool(completed), time.monotonic() - start
+
+def _mark_filtered(conn, chronology_table, professor_ids):
+    if not professor_ids:
+        return
+    conn.executemany(f'''
+        UPDATE "{chronology_table}"
+        SET "data_filtering_completed" = TRUE
+        WHERE "ID" = ?
+    ''', [(professor_id,) for professor_id in professor_ids])
+    conn.commit()
+
+def filter_professor_data(professor_name, project_directory):
+    # Returns True once the filtered data is saved
+    logger = get_logger()
 
     safe_professor_name = ''.join(c if c.isalnum() else '_' for c in professor_name)
     professor_dir = os.path.join(project_directory, 'data', safe_professor_name)
@@ -33,22 +143,22 @@ def filter_professor_data(professor_name, project_directory):
         logger.error(f"Professor directory '{professor_dir}' does not exist.")
         return
 
-    data_file = os.path.join(professor_dir, 'professor_data.json')
-    if not os.path.exists(data_file):
-        logger.error(f"Professor data file '{data_file}' does not exist.")
+    if not professor_store.exists(professor_dir):
+        logger.error(f"No gathered data for {professor_name} in '{professor_dir}'.")
         return
 
-    with open(data_file, 'r', encoding='utf-8') as f:
-        professor_data = json.load(f)
+    # Sources are read lazily, and only those filtering uses
+    professor_data = professor_store.ProfessorData(professor_dir)
 
     articles = []
 
+    # Normalized forms of the professor's name, computed once for every author comparison
+    matcher = NameMatcher(professor_name)
+
     # Process 'scholarly' data
     try:
-        scholarly_data = professor_data.get('scholarly', {})
-        publications = scholarly_data.get('publications', [])
-        for pub in publications:
-            article = extract_article_from_scholarly(pub, professor_name, logger)
+        for pub in professor_data.records('scholarly', 'publications'):
+            article = extract_article_from_scholarly(pub, professor_name, logger, matcher)
             if article:
                 articles.append(article)
         logger.info(f"Processed scholarly data for {professor_name}")
@@ -58,8 +168,12 @@ def filter_professor_data(professor_name, project_directory):
     # Process 'entrez' data
     try:
         entrez_data = professor_data.get('entrez', [])
+        if isinstance(entrez_data, dict) and entrez_data.get('xml_file'):
+            # Streamed from the PubMed XML saved by data gathering
+            xml_file = os.path.join(professor_dir, entrez_data['xml_file'])
+            entrez_data = (pubmed_xml.parse_article(element) for element in pubmed_xml.iter_articles(xml_file))
         for pub in entrez_data:
-            article = extract_article_from_entrez(pub, professor_name, logger)
+            article = extract_article_from_entrez(pub, professor_name, logger, matcher)
             if article:
                 articles.append(article)
         logger.info(f"Processed Entrez data for {professor_name}")
@@ -68,9 +182,8 @@ def filter_professor_data(professor_name, project_directory):
 
     # Process 'crossref' data
     try:
-        crossref_data = professor_data.get('crossref', [])
-        for pub in crossref_data:
-            article = extract_article_from_crossref(pub, professor_name, logger)
+        for pub in professor_data.records('crossref'):
+            article = extract_article_from_crossref(pub, professor_name, logger, matcher)
             if article:
                 articles.append(article)
         logger.info(f"Processed Crossref data for {professor_name}")
@@ -91,8 +204,21 @@ def filter_professor_data(professor_name, project_directory):
     except Exception as e:
         logger.exception(f"Error processing ORCID data for {professor_name}: {e}")
 
-    # Remove duplicates
-    articles_unique = {article['title']: article for article in articles}.values()
+    # Merge records of the same paper from different sources, even when
+    # their titles differ in casing, punctuation or a word or two
+    articles_unique = merge_duplicate_articles(articles)
+    logger.info(f"Merged {len(articles)} records into {len(articles_unique)} articles for {professor_name}")
+
+    # Make the professor's articles searchable across the campaign (by
+    # keyword or co-author) before any of them are dropped below
+    try:
+        publication_index.open_index(project_directory)
+        publication_index.index_articles(professor_name, [
+            (normalize_title(article['title']), ' '.join(normalize_name(article['first_author'])[-1:]), article)
+            for article in articles_unique
+        ])
+    except sqlite3.Error as e:
+        logger.exception(f"Error indexing publications for {professor_name}: {e}")
 
     # **Modified Filtering Criteria**
     # Include articles from the last 5 years (or more recent)
@@ -107,6 +233,16 @@ def filter_professor_data(professor_name, project_directory):
     # Sort articles
     articles_sorted = sort_articles(articles_filtered, professor_name)
 
+    # Keep the articles closest to the CV, favoring recent ones, so the
+    # prompts built from them list only the articles that matter
+    cv_file = os.path.join(project_directory, 'CV_simplified.txt')
+    if RANK_BY_CV and os.path.exists(cv_file):
+        articles_sorted = relevance.rank_articles(articles_sorted, relevance.load_text(cv_file), current_year,
+                                                  ARTICLES_TOP_K, RECENCY_WEIGHT)
+        logger.info(f"Kept {len(articles_sorted)} of {len(articles_filtered)} articles by relevance to the CV")
+    elif RANK_BY_CV:
+        logger.warning(f"Simplified CV file '{cv_file}' does not exist; articles are ranked by year only.")
+
     # Save the filtered data to a JSON file
     filtered_data = {
         'articles': articles_sorted
@@ -116,8 +252,10 @@ def filter_professor_data(professor_name, project_directory):
     with open(data_filtered_file, 'w', encoding='utf-8') as f:
         json.dump(filtered_data, f, indent=4)
     logger.info(f"Filtered data saved to {data_filtered_file}")
+    return True
 
-def extract_article_from_scholarly(pub, professor_name, logger):
+def extract_article_from_scholarly(pub, professor_name, logger, matcher=None):
+    matcher = matcher or NameMatcher(professor_name)
     try:
         title = pub.get('bib', {}).get('title', '').strip()
         authors_raw = pub.get('bib', {}).get('author', '')
@@ -144,19 +282,53 @@ def extract_article_from_scholarly(pub, professor_name, logger):
             'source': 'scholarly',
             'first_author': first_author,
             'corresponding_author': corresponding_author,
-            'professor_is_first_author': is_name_match(professor_name, first_author),
-            'professor_is_corresponding_author': is_name_match(professor_name, corresponding_author),
+            'professor_is_first_author': matcher.matches(first_author),
+            'professor_is_corresponding_author': matcher.matches(corresponding_author),
         }
         return article
     except Exception as e:
         logger.exception(f"Error extracting article from scholarly: {e}")
         return None
 
-def extract_article_from_entrez(pub, professor_name, logger):
-    # Implemented as needed, similar to the other extraction functions
-    return None  # Placeholder
+def extract_article_from_entrez(pub, professor_name, logger, matcher=None):
+    # 'pub' is a PubMed record as flattened by pubmed_xml.parse_article
+    matcher = matcher or NameMatcher(professor_name)
+    try:
+        title = (pub.get('title') or '').strip()
+        if not title:
+            # Older gathers stored PubMed hits as bare abstracts; without a
+            # title there is nothing to match, rank or show
+            logger.debug(f"Skipping untitled PubMed record {pub.get('pubmed_id', '')}")
+            return None
+        authors = pub.get('authors', [])
+
+        # Handle missing or invalid publication year
+        year = parse_year(str(pub.get('year', '')).strip(), logger, title)
+
+        abstract = pub.get('abstract', '').strip()
+        first_author = authors[0] if authors else ''
+        corresponding_author = authors[-1] if authors else ''
+
+        article = {
+            'title': title,
+            'authors': authors,
+            'year': year,
+            'abstract': abstract,
+            'source': 'entrez',
+            'first_author': first_author,
+            'corresponding_author': corresponding_author,
+            'professor_is_first_author': matcher.matches(first_author),
+            'professor_is_corresponding_author': matcher.matches(corresponding_author),
+            'affiliations': pub.get('affiliations', []),
+            'pmid': pub.get('pubmed_id', ''),
+        }
+        return article
+    except Exception as e:
+        logger.exception(f"Error extracting article from Entrez: {e}")
+        return None
 
-def extract_article_from_crossref(pub, professor_name, logger):
+def extract_article_from_crossref(pub, professor_name, logger, matcher=None):
+    matcher = matcher or NameMatcher(professor_name)
     try:
         title = pub.get('title', [''])[0].strip()
         authors_list = pub.get('author', [])
@@ -201,8 +373,9 @@ def extract_article_from_crossref(pub, professor_name, logger):
             'source': 'crossref',
             'first_author': first_author,
             'corresponding_author': corresponding_author,
-            'professor_is_first_author': is_name_match(professor_name, first_author),
-            'professor_is_corresponding_author': is_name_match(professor_name, corresponding_author),
+            'professor_is_first_author': matcher.matches(first_author),
+            'professor_is_corresponding_author': matcher.matches(corresponding_author),
+            'doi': pub.get('DOI', ''),
         }
         return article
     except Exception as e:
@@ -239,42 +412,210 @@ def extract_article_from_orcid(work_summary, professor_name, logger):
         logger.exception(f"Error extracting article from ORCID: {e}")
         return None
 
+def merge_duplicate_articles(articles):
+    # Group records whose normalized titles are equal or near-duplicates
+    # (MinHash with banded LSH to find candidates, confirmed by the Jaccard
+    # similarity of their word shingles and by compatible_records), then
+    # merge each group field by field.
+    groups = UnionFind(len(articles))
+    shingles = [title_shingles(article['title']) for article in articles]
+    buckets = {}
+    for i, article in enumerate(articles):
+        key = normalize_title(article['title'])
+        if not key:
+            continue
+        buckets.setdefault(('title', key), []).append(i)
+        signature = minhash_signature(shingles[i])
+        for band in range(MINHASH_BANDS):
+            rows = tuple(signature[band * MINHASH_ROWS:(band + 1) * MINHASH_ROWS])
+            buckets.setdefault((band, rows), []).append(i)
+
+    for (kind, _), members in buckets.items():
+        for position, i in enumerate(members[1:], 1):
+            if kind == 'title':
+                groups.union(members[0], i)
+                continue
+            for j in members[:position]:
+                if (jaccard(shingles[i], shingles[j]) >= TITLE_SIMILARITY_THRESHOLD
+                        and compatible_records(articles[i], articles[j])):
+                    groups.union(i, j)
+
+    merged = {}
+    untitled = None
+    for i, article in enumerate(articles):
+        if not normalize_title(article['title']):
+            # Records without a title cannot be matched; keep one, as before
+            untitled = article
+            continue
+        merged.setdefault(groups.find(i), []).append(article)
+    result = [merge_articles(records) for records in merged.values()]
+    if untitled is not None:
+        result.append(untitled)
+    return result
+
+def merge_articles(records):
+    # Combine records of one paper, keeping the best of every field: the
+    # longest title and abstract, the fullest author list (with the author
+    # flags computed from it) and the year of the most trusted source
+    if len(records) == 1:
+        return records[0]
+    by_priority = sorted(records, key=lambda record: source_rank(record['source']))
+    authors_record = max(by_priority, key=lambda record: len(record['authors']))
+    merged = dict(authors_record)
+    merged['title'] = max((record['title'] for record in by_priority), key=len)
+    merged['abstract'] = max((record['abstract'] for record in by_priority), key=len)
+    merged['year'] = next((record['year'] for record in by_priority if record['year']), 0)
+    for identifier in ('doi', 'pmid'):
+        value = next((record[identifier] for record in by_priority if record.get(identifier)), '')
+        if value:
+            merged[identifier] = value
+    affiliations = []
+    for record in by_priority:
+        for affiliation in record.get('affiliations', []):
+            if affiliation not in affiliations:
+                affiliations.append(affiliation)
+    if affiliations:
+        merged['affiliations'] = affiliations
+    sources = []
+    for record in by_priority:
+        for source in record['source'].split(', '):
+            if source not in sources:
+                sources.append(source)
+    merged['source'] = ', '.join(sources)
+    return merged
+
+def source_rank(source):
+    source = source.split(', ')[0]
+    return SOURCE_PRIORITY.index(source) if source in SOURCE_PRIORITY else len(SOURCE_PRIORITY)
+
+def normalize_title(title):
+    title = unidecode.unidecode((title or '').lower())
+    return ' '.join(re.sub(r'[^\w\s]', ' ', title).split())
+
+def title_shingles(title):
+    # Word shingles, with plural 's' dropped so "prediction(s)" still match
+    words = [word[:-1] if len(word) > 3 and word.endswith('s') else word for word in normalize_title(title).split()]
+    if len(words) <= TITLE_SHINGLE_SIZE:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + TITLE_SHINGLE_SIZE]) for i in range(len(words) - TITLE_SHINGLE_SIZE + 1)}
+
+def compatible_records(a, b):
+    # Whether two records with similar titles can be the same paper: their
+    # titles carry the same numbers and roman numerals, and they agree on the
+    # year (within MAX_YEAR_GAP) or on the first author's surname
+    if title_numbers(a['title']) != title_numbers(b['title']):
+        return False
+    if a['year'] and b['year'] and abs(a['year'] - b['year']) <= MAX_YEAR_GAP:
+        return True
+    first_a = normalize_name(a['first_author'])
+    first_b = normalize_name(b['first_author'])
+    if first_a and first_b:
+        return first_a[-1] in first_b or first_b[-1] in first_a
+    # Nothing to compare beyond the title
+    return not (a['year'] and b['year'])
+
+def title_numbers(title):
+    return sorted(word for word in normalize_title(title).split() if _number_re.match(word))
+
+def minhash_signature(shingles):
+    hashes = [zlib.crc32(shingle.encode('utf-8')) for shingle in shingles] or [0]
+    return [min((a * h + b) % MINHASH_PRIME for h in hashes) for a, b in _minhash_params]
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+class UnionFind:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, i):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i, j):
+        root_i, root_j = self.find(i), self.find(j)
+        if root_i != root_j:
+            self.parent[max(root_i, root_j)] = min(root_i, root_j)
+
 def sort_articles(articles, professor_name):
     # Sort articles by year descending
     articles_sorted = sorted(articles, key=lambda x: x['year'], reverse=True)
     return articles_sorted
 
-def is_professor_in_authors(professor_name, authors):
-    for author in authors:
-        if is_name_match(professor_name, author):
+class NameMatcher:
+    # Matches author names against one professor. The professor's normalized
+    # name and its variants are computed once, and author names go through a
+    # cached normalization, so each comparison is a few tuple and set lookups.
+    # An author matches on the same last name ("J. Smith", "John Smith"), or
+    # when written family name first ("Smith J", "Smith JA", "Smith John A"):
+    # the family name followed by the professor's first given name, or by
+    # initials starting with their first initial.
+
+    def __init__(self, professor_name):
+        self.parts = normalize_name(professor_name)
+        self.last = self.parts[-1] if self.parts else ''
+        given = self.parts[:-1]
+        initials = tuple(part[0] for part in given)
+        self.first = given[0] if given else ''
+        self.family_first = {
+            (self.last,) + given,
+            (self.last,) + initials,
+            (self.last, ''.join(initials)),
+        } if given else set()
+
+    def matches(self, author_name):
+        author_parts = normalize_name(author_name)
+        if not author_parts or not self.parts:
+            return False
+        # Same last name; this also covers an exact match
+        if author_parts[-1] == self.last:
             return True
-    return False
-
-def is_name_match(professor_name, author_name):
-    # Normalize names by removing accents and converting to lowercase
-    professor_name_norm = unidecode.unidecode(professor_name.lower())
-    author_name_norm = unidecode.unidecode(author_name.lower())
-
-    # Remove punctuation and extra whitespace
-    professor_name_norm = re.sub(r'[^\w\s]', '', professor_name_norm).strip()
-    author_name_norm = re.sub(r'[^\w\s]', '', author_name_norm).strip()
-
-    # Split names into parts
-    professor_name_parts = professor_name_norm.split()
-    author_name_parts = author_name_norm.split()
-
-    # Match based on last names
-    if len(professor_name_parts) >= 1 and len(author_name_parts) >= 1:
-        prof_last = professor_name_parts[-1]
-        auth_last = author_name_parts[-1]
-        if prof_last == auth_last:
+        if author_parts in self.family_first:
             return True
+        # Family name first, then the first name or initials ("ja" in "Smith JA")
+        if len(author_parts) < 2 or author_parts[0] != self.last or not self.first:
+            return False
+        given = author_parts[1]
+        return given == self.first or (len(given) <= MAX_INITIALS and given[0] == self.first[0])
+
+    def in_authors(self, authors):
+        return any(self.matches(author) for author in authors)
+
+# (professor, author, expected) cases NameMatcher must get right; checked
+# before filtering starts, so a change to the matching cannot silently drop
+# or add a professor's articles
+NAME_MATCH_CASES = (
+    ('John Smith', 'John Smith', True),
+    ('John Smith', 'J. Smith', True),
+    ('John Smith', 'Smith J', True),
+    ('John Smith', 'Smith JA', True),
+    ('John Smith', 'Smith John A', True),
+    ('John A Smith', 'Smith JA', True),
+    ('John Smith', 'Smith KA', False),
+    ('John Smith', 'Smith Karen', False),
+    ('John Smith', 'John Doe', False),
+)
+
+def check_name_matching():
+    for professor_name, author_name, expected in NAME_MATCH_CASES:
+        if NameMatcher(professor_name).matches(author_name) != expected:
+            raise AssertionError(f"NameMatcher('{professor_name}').matches('{author_name}') is not {expected}")
+
+@lru_cache(maxsize=65536)
+def normalize_name(name):
+    # Lowercase, strip accents and punctuation, and split into parts
+    name = unidecode.unidecode((name or '').lower())
+    return tuple(re.sub(r'[^\w\s]', '', name).split())
 
-    # Exact match
-    if professor_name_norm == author_name_norm:
-        return True
+def is_professor_in_authors(professor_name, authors):
+    return NameMatcher(professor_name).in_authors(authors)
 
-    return False
+def is_name_match(professor_name, author_name):
+    return NameMatcher(professor_name).matches(author_name)
 
 def parse_year(year_str, logger, title):
     # Attempt to parse the year from the string
@@ -3,358 +3,796 @@
 import os
 import sqlite3
 import requests
+import database_utils
+import http_client
+import page_cache
+import page_store
+import pubmed_client
+import pubmed_xml
+import professor_store
+import orcid_client
+import source_cache
+from crawl_manifest import CrawlManifest
+import crawl_budget
+import discovery
+from novelty import NoveltyTracker
+from crawl_budget import CrawlBudget
+from frontier import CrawlFrontier, score_link
+from url_utils import canonicalize_url
 from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
 import re
-import json
 import time
-import random
+import hashlib
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait, as_completed, FIRST_COMPLETED
+import config
 from config import (
     SEARCH_DEPTH,
     SEARCH_STYLE,
     SERPAPI_API_KEY,
-    ENTREZ_EMAIL,
     ORCID_CLIENT_ID,
-    ORCID_CLIENT_SECRET
+    ORCID_CLIENT_SECRET,
+    REMINDER_INTERVAL_1,
+    REMINDER_INTERVAL_2,
+    REMINDER_INTERVAL_3
 )
 import datetime
 
+# Whole-table gathering (optional in config.py)
+GATHER_WORKERS = getattr(config, 'GATHER_WORKERS', 8)  # Professors gathered in parallel
+GATHER_MAX_INFLIGHT = getattr(config, 'GATHER_MAX_INFLIGHT', 32)  # Page requests in flight across all professors
+GATHER_DEADLINE = getattr(config, 'GATHER_DEADLINE', 0)  # Seconds a whole-table run may take (0 = no limit)
+
+# Crawler concurrency (optional in config.py)
+CRAWL_CONCURRENCY = getattr(config, 'CRAWL_CONCURRENCY', 8)  # Max in-flight page requests per crawl
+CRAWL_PER_HOST_LIMIT = getattr(config, 'CRAWL_PER_HOST_LIMIT', 2)  # Max in-flight requests per host
+CRAWL_PAGE_BUDGET = getattr(config, 'CRAWL_PAGE_BUDGET', 40)  # Max pages fetched per crawl, most relevant first (0 = no limit)
+CRAWL_BYTE_BUDGET = getattr(config, 'CRAWL_BYTE_BUDGET', 50 * 1024 * 1024)  # Max bytes saved per professor (0 = no limit)
+CRAWL_TIME_BUDGET = getattr(config, 'CRAWL_TIME_BUDGET', 600)  # Max seconds of crawling per professor (0 = no limit)
+
+# Adaptive crawl depth (optional in config.py)
+ADAPTIVE_DEPTH = getattr(config, 'ADAPTIVE_DEPTH', False)  # Let text novelty decide the depth instead of SEARCH_DEPTH
+ADAPTIVE_MAX_DEPTH = getattr(config, 'ADAPTIVE_MAX_DEPTH', 4)  # Deepest level an adaptive crawl may reach
+NOVELTY_THRESHOLD = getattr(config, 'NOVELTY_THRESHOLD', 0.2)  # Stop descending below this share of new text
+
+# Link targets that are never fetched by the crawler
+SKIPPED_EXTENSIONS = (
+    '.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.ico', '.bmp', '.tif', '.tiff',
+    '.mp4', '.mov', '.avi', '.mkv', '.webm', '.mp3', '.wav', '.ogg', '.m4a',
+    '.zip', '.gz', '.tgz', '.rar', '.7z', '.tar', '.dmg', '.exe', '.iso',
+    '.ppt', '.pptx', '.xls', '.xlsx', '.css', '.js', '.woff', '.woff2', '.ttf', '.ics',
+)
+
+# Page elements left out of the extracted text
+TEXT_SKIPPED_TAGS = ('script', 'style', 'header', 'footer', 'nav', 'aside', 'form', 'noscript')
+
+# Per-source deadlines in seconds for the metadata lookups (optional in config.py)
+SOURCE_DEADLINES = getattr(config, 'SOURCE_DEADLINES', {
+    'scholarly': 120,
+    'serpapi': 30,
+    'entrez': 60,
+    'crossref': 30,
+    'orcid': 60,
+})
+SOURCE_DEFAULT_DEADLINE = 60
+SOURCE_MAX_UNFINISHED = getattr(config, 'SOURCE_MAX_UNFINISHED', 16)  # Calls per source still running (e.g. hung past their deadline) before new ones are refused
+
+# Source calls that have not returned yet, per source
+_source_slots = {}
+_source_slots_lock = threading.Lock()
+
+_host_slots = {}
+_host_slots_lock = threading.Lock()
+_request_slots = threading.BoundedSemaphore(GATHER_MAX_INFLIGHT)
+
 # Import the libraries
 from scholarly import scholarly
 from serpapi import GoogleSearch
-from Bio import Entrez
 from habanero import Crossref
 
-def main(db_file, table_name, project_directory, search_depth, professor_id=None):
+def main(db_file, table_name, project_directory, search_depth, professor_id=None, workers=None):
     conn = sqlite3.connect(db_file)
     cursor = conn.cursor()
 
+    # Revalidate previously downloaded pages instead of downloading them again,
+    # and keep pages shared between professors in a single content-addressed store
+    page_cache.open_cache(project_directory)
+    orcid_client.open_cache(project_directory)
+    source_cache.open_cache(project_directory)
+
     # Define supplementary columns
     supplementary_columns = [f"Supplementary{i}" for i in range(1, 11)]
-    columns = ["ID", "Professor", "Webpage"] + supplementary_columns
-    columns_str = ", ".join([f'"{col}"' for col in columns])
+    columns = ["ID", "Professor", "Webpage", "Email"] + supplementary_columns
+    columns_str = ", ".join([f'p."{col}"' for col in columns])
+    chronology_table = f"{table_name}_chronology"
 
     # Fetch professor details
     if professor_id:
         cursor.execute(f"""
             SELECT {columns_str}
-            FROM "{table_name}"
-            WHERE "ID" = ?
+            FROM "{table_name}" p
+            WHERE p."ID" = ?
         """, (professor_id,))
         professors = cursor.fetchall()
     else:
+        # Whole-table mode: professors already gathered (e.g. before a crash) are skipped
+        database_utils.create_tables(conn, table_name)
         cursor.execute(f"""
             SELECT {columns_str}
-            FROM "{table_name}"
+            FROM "{table_name}" p
+            LEFT JOIN "{chronology_table}" c ON p."ID" = c."ID"
+            WHERE c."data_gathering_completed" IS NULL OR NOT c."data_gathering_completed"
         """)
         professors = cursor.fetchall()
+        print(f"{len(professors)} professors left to gather")
+
+    # When several professors are gathered, their PubMed lookups share efetch requests
+    if len(professors) > 1:
+        pubmed_client.enable_batching()
+
+    professors = [dict(zip(columns, professor)) for professor in professors]
+
+    if professor_id:
+        for prof_data in professors:
+            budget = gather_professor(prof_data, project_directory, search_depth)
+            checkpoint_gathering(conn, chronology_table, prof_data, search_depth, budget.exhausted)
+    else:
+        # Gather many professors at once; each one is checkpointed into the
+        # chronology table as soon as it finishes, so a crashed run resumes.
+        # Professors not started before GATHER_DEADLINE are left for the next run.
+        crawl_budget.start_run(GATHER_DEADLINE)
+        workers = workers or GATHER_WORKERS
+        completed = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(gather_professor, prof_data, project_directory, search_depth): prof_data
+                for prof_data in professors
+            }
+            for future in as_completed(futures):
+                prof_data = futures[future]
+                try:
+                    budget = future.result()
+                except Exception as e:
+                    print(f"Error gathering data for Professor ID {prof_data['ID']}: {e}")
+                    continue
+                if budget is None:
+                    continue
+                checkpoint_gathering(conn, chronology_table, prof_data, search_depth, budget.exhausted)
+                completed += 1
+                print(f"Gathering progress: {completed}/{len(professors)} professors")
 
-    for professor in professors:
-        prof_data = dict(zip(columns, professor))
-        prof_id = prof_data["ID"]
-        professor_name = prof_data["Professor"]
-        webpage_url = prof_data["Webpage"]
-        supplementary_urls = [prof_data[f"Supplementary{i}"] for i in range(1, 11)]
+    for source, (hits, misses) in sorted(source_cache.stats().items()):
+        print(f"Source cache {source}: {hits} hits, {misses} misses")
 
-        print(f"Gathering data for Professor ID {prof_id}: {professor_name}")
+    conn.close()
 
-        # Create a directory for the professor
-        safe_professor_name = ''.join(c if c.isalnum() else '_' for c in professor_name)
-        professor_dir = os.path.join(project_directory, 'data', safe_professor_name)
-        os.makedirs(professor_dir, exist_ok=True)
+def gather_professor(prof_data, project_directory, search_depth):
+    prof_id = prof_data["ID"]
+    professor_name = prof_data["Professor"]
+    webpage_url = prof_data["Webpage"]
+    supplementary_urls = [prof_data[f"Supplementary{i}"] for i in range(1, 11)]
 
-        # Initialize data dictionary
-        professor_data = {
-            'scholarly': {},
-            'serpapi': {},
-            'entrez': {},
-            'crossref': {},
-            'orcid': {}
-        }
+    # Returns the professor's crawl budget (see 'exhausted'), or None when the
+    # run deadline passed before the professor was started
+    if crawl_budget.run_deadline_passed():
+        print(f"Run deadline passed; Professor ID {prof_id} is left for the next run")
+        return None
+
+    print(f"Gathering data for Professor ID {prof_id}: {professor_name}")
 
-        saved_pages = set()  # To keep track of saved URLs
+    # Create a directory for the professor
+    safe_professor_name = ''.join(c if c.isalnum() else '_' for c in professor_name)
+    professor_dir = os.path.join(project_directory, 'data', safe_professor_name)
+    os.makedirs(professor_dir, exist_ok=True)
 
-        # Fetch and save the professor's main webpage
+    # Initialize data dictionary
+    professor_data = {
+        'scholarly': {},
+        'serpapi': {},
+        'entrez': {},
+        'crossref': {},
+        'orcid': {}
+    }
+
+    saved_pages = set()  # To keep track of saved URLs
+    budget = new_crawl_budget()  # Pages, bytes and time this professor's crawl may use
+
+    # What was fetched for this professor, and when; pages fetched recently
+    # enough are reused from disk instead of being requested again
+    manifest = CrawlManifest(professor_dir)
+
+    # In adaptive mode the crawl goes as deep as pages keep adding new text
+    if ADAPTIVE_DEPTH:
+        novelty = NoveltyTracker()
+        crawl_depth = ADAPTIVE_MAX_DEPTH
+    else:
+        novelty = None
+        crawl_depth = search_depth
+
+    # Fetch and save the professor's main webpage
     if webpage_url:
         try:
-            response = requests.get(webpage_url)
-            response.raise_for_status()
-            main_page_content = response.text
-
             # Save the main page content with a consistent filename
             main_page_file = os.path.join(professor_dir, 'main_page.html')
-            with open(main_page_file, 'w', encoding='utf-8') as f:
-                f.write(main_page_content)
-            print(f"Saved main webpage for {professor_name}")
+            if manifest.fresh_entry(webpage_url):
+                with open(main_page_file, 'r', encoding='utf-8') as f:
+                    main_page_content = f.read()
+                main_page_changed = False
+                print(f"Main webpage for {professor_name} is recent; not refetched")
+            else:
+                page = page_cache.fetch(webpage_url)
+                main_page_content = page.text
+                main_page_changed = page.changed or not os.path.exists(main_page_file)
+                if main_page_changed:
+                    page_store.save_text(main_page_content, main_page_file)
+                    print(f"Saved main webpage for {professor_name}")
+                else:
+                    print(f"Main webpage unchanged for {professor_name}")
+                manifest.record(webpage_url, 'main_page.html', page.body_hash, 'ok', 0)
+                budget.add_bytes(os.path.getsize(main_page_file))
+            main_page_links = process_html(main_page_content, main_page_file, webpage_url, main_page_changed,
+                                           novelty)
 
             # Add the URL to saved_pages to avoid duplicates
             saved_pages.add(webpage_url)
 
+            # Pages listed in the site's sitemaps and feeds are fetched first,
+            # newest first; the link crawl then uses whatever budget is left
+            discovered = discovery.discover_urls(webpage_url, main_page_content)
+            if discovered:
+                print(f"Found {len(discovered)} pages in sitemaps and feeds for {professor_name}")
+                fetch_discovered(discovered, professor_dir, saved_pages, budget, manifest, novelty)
+
             # Determine search style
             if SEARCH_STYLE == 1:
                 # Breadth-First Search
-                fetch_links_bfs(webpage_url, professor_dir, search_depth, saved_pages)
+                fetch_links_bfs(webpage_url, professor_dir, crawl_depth, saved_pages, main_page_links,
+                                budget=budget, manifest=manifest, novelty=novelty)
             elif SEARCH_STYLE == 2:
                 # Depth-First Search
-                fetch_links_dfs(webpage_url, professor_dir, search_depth, saved_pages)
+                fetch_links_dfs(webpage_url, professor_dir, crawl_depth, saved_pages, seed_links=main_page_links,
+                                budget=budget, manifest=manifest, novelty=novelty)
             else:
                 print(f"Invalid SEARCH_STYLE: {SEARCH_STYLE}")
         except requests.RequestException as e:
             print(f"Failed to fetch webpage for {professor_name}: {e}")
+            manifest.record(webpage_url, None, None, 'error', 0)
     else:
         print(f"No webpage URL provided for {professor_name}")
 
-        # Download supplementary URLs
-        for idx, url in enumerate(supplementary_urls, start=1):
-            if url and url.strip():
-                try:
-                    response = requests.get(url)
-                    response.raise_for_status()
-                    content_type = response.headers.get('Content-Type', '').lower()
-
-                    if 'application/pdf' in content_type:
-                        # It's a PDF file
-                        content = response.content
-                        filename = f"supplementary{idx}.pdf"
-                        filepath = os.path.join(professor_dir, filename)
-                        with open(filepath, 'wb') as f:
-                            f.write(content)
+    # Download supplementary URLs
+    for idx, url in enumerate(supplementary_urls, start=1):
+        if url and url.strip():
+            if manifest.fresh_entry(url):
+                print(f"Supplementary URL {idx} is recent; not refetched: {url}")
+                continue
+            try:
+                # Streamed to disk; media and oversized files are skipped
+                page = page_cache.fetch(url)
+
+                if page.kind == 'pdf':
+                    # It's a PDF file
+                    filename = f"supplementary{idx}.pdf"
+                    filepath = os.path.join(professor_dir, filename)
+                    if page.changed or not os.path.exists(filepath):
+                        page.save_bytes(filepath)
                         print(f"Saved supplementary PDF {idx}: {url}")
                     else:
-                        # Assume it's an HTML page
-                        content = response.text
-                        filename = f"supplementary{idx}.html"
-                        filepath = os.path.join(professor_dir, filename)
-                        with open(filepath, 'w', encoding='utf-8') as f:
-                            f.write(content)
+                        print(f"Supplementary PDF {idx} unchanged: {url}")
+                else:
+                    # Assume it's an HTML page
+                    filename = f"supplementary{idx}.html"
+                    filepath = os.path.join(professor_dir, filename)
+                    changed = page.changed or not os.path.exists(filepath)
+                    if changed:
+                        page_store.save_text(page.text, filepath)
                         print(f"Saved supplementary page {idx}: {url}")
-                except requests.RequestException as e:
-                    print(f"Failed to fetch supplementary URL {url}: {e}")
-
-        # Add a small delay to avoid overwhelming servers
-        time.sleep(random.uniform(1, 3))
-
-        # Gather additional data using the libraries
-        try:
-            # 1. Use scholarly to get author profile and publications
-            search_query = scholarly.search_author(professor_name)
-            author = next(search_query, None)
-            if author and author['name'].lower() == professor_name.lower():
-                author = scholarly.fill(author)
-                professor_data['scholarly'] = author
-                print(f"Retrieved scholarly data for {professor_name}")
+                    else:
+                        print(f"Supplementary page {idx} unchanged: {url}")
+                    process_html(page.text, filepath, url, changed)
+                manifest.record(url, filename, page.body_hash, 'ok', 0)
+            except page_cache.UnwantedContent as e:
+                print(e)
+                manifest.record(url, None, None, 'skipped', 0)
+            except requests.RequestException as e:
+                print(f"Failed to fetch supplementary URL {url}: {e}")
+                manifest.record(url, None, None, 'error', 0)
+    manifest.save()
+    remove_legacy_pages(professor_dir, manifest)
+
+    # Gather additional data using the libraries. The sources are queried
+    # concurrently and each one has its own deadline; whatever finished in
+    # time is saved, and the outcome of every source is recorded.
+    source_data, source_status = gather_source_data(professor_name)
+    professor_data.update(source_data)
+    professor_data['source_status'] = source_status
+
+    # PubMed records are kept as XML in their own file, which filtering
+    # reads one article at a time, and only referenced from the store
+    entrez_articles = professor_data.get('entrez')
+    if entrez_articles and all(isinstance(article, str) for article in entrez_articles):
+        pubmed_xml.write_articles(os.path.join(professor_dir, pubmed_xml.PUBMED_XML_FILE), entrez_articles)
+        professor_data['entrez'] = {'xml_file': pubmed_xml.PUBMED_XML_FILE, 'count': len(entrez_articles)}
+
+    # Save the collected data, one compressed shard per source
+    store_dir = professor_store.save(professor_dir, professor_data)
+    print(f"Saved professor data to {store_dir}")
+    return budget
+
+def checkpoint_gathering(conn, chronology_table, prof_data, search_depth, budget_exhausted=None):
+    # Mark a professor as gathered. The later stages are reset so fresh data is
+    # filtered and turned into a new email again; the sending and reminder
+    # history of the row is kept. 'budget_exhausted' names the crawl limit
+    # that cut the crawl short, if any
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        INSERT INTO "{chronology_table}" (
+            "ID", "Email", "search_style", "search_depth", "search_date",
+            "data_gathering_completed", "reminder_interval_1", "reminder_interval_2", "reminder_interval_3",
+            "crawl_budget_exhausted"
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT("ID") DO UPDATE SET
+            "search_style" = excluded."search_style",
+            "search_depth" = excluded."search_depth",
+            "search_date" = excluded."search_date",
+            "data_gathering_completed" = excluded."data_gathering_completed",
+            "crawl_budget_exhausted" = excluded."crawl_budget_exhausted",
+            "data_filtering_completed" = FALSE,
+            "html_generation_completed" = FALSE,
+            "cv_generation_completed" = FALSE
+    ''', (
+        prof_data["ID"],
+        prof_data["Email"],
+        SEARCH_STYLE,
+        search_depth,
+        int(datetime.datetime.now().timestamp()),
+        True,
+        REMINDER_INTERVAL_1,
+        REMINDER_INTERVAL_2,
+        REMINDER_INTERVAL_3,
+        budget_exhausted
+    ))
+    conn.commit()
+
+def gather_source_data(professor_name):
+    # Run every metadata source in parallel. Returns the data of the sources that
+    # answered before their deadline and a per-source status
+    # ('ok', 'not_found', 'error' or 'timeout', with the elapsed seconds).
+    sources = {
+        'scholarly': fetch_scholarly_data,
+        'serpapi': fetch_serpapi_data,
+        'entrez': fetch_entrez_data,
+        'crossref': fetch_crossref_data,
+        'orcid': fetch_orcid_data,
+    }
+    source_data = {}
+    source_status = {}
+
+    # Answers cached from earlier runs are used without querying the source
+    for source in list(sources):
+        hit, result = source_cache.get(source, professor_name)
+        if hit:
+            del sources[source]
+            if result:
+                source_data[source] = result
+            source_status[source] = {'status': 'ok' if result else 'not_found', 'seconds': 0, 'cached': True}
+            print(f"Using cached {source} data for {professor_name}")
+    if not sources:
+        return source_data, source_status
+
+    # Each call runs on its own daemon thread: a source that hangs past its
+    # deadline is abandoned without holding up the next professor or the
+    # process exit. A source with SOURCE_MAX_UNFINISHED calls still running
+    # is not called again until some of them return.
+    start = time.monotonic()
+    futures = {}
+    for source, fetch in sources.items():
+        future = run_source_call(source, fetch, professor_name)
+        if future is None:
+            source_status[source] = {'status': 'error', 'error': 'too many unfinished calls', 'seconds': 0}
+            print(f"Skipped {source} for {professor_name}: {SOURCE_MAX_UNFINISHED} earlier calls have not returned")
+            continue
+        futures[future] = source
+    deadlines = {source: start + SOURCE_DEADLINES.get(source, SOURCE_DEFAULT_DEADLINE) for source in sources}
+    pending = set(futures)
+
+    while pending:
+        now = time.monotonic()
+        for future in [f for f in pending if deadlines[futures[f]] <= now]:
+            source = futures[future]
+            pending.remove(future)
+            source_status[source] = {'status': 'timeout', 'seconds': round(now - start, 2)}
+            print(f"Timed out fetching {source} data for {professor_name}")
+        if not pending:
+            break
+
+        next_deadline = min(deadlines[futures[f]] for f in pending)
+        done, _ = wait(pending, timeout=max(0, next_deadline - now), return_when=FIRST_COMPLETED)
+        for future in done:
+            source = futures[future]
+            pending.remove(future)
+            elapsed = round(time.monotonic() - start, 2)
+            try:
+                result = future.result()
+            except Exception as e:
+                source_status[source] = {'status': 'error', 'error': str(e), 'seconds': elapsed}
+                print(f"Error fetching {source} data for {professor_name}: {e}")
+                continue
+            source_cache.put(source, professor_name, result or None)
+            if result:
+                source_data[source] = result
+                source_status[source] = {'status': 'ok', 'seconds': elapsed}
+                print(f"Retrieved {source} data for {professor_name}")
             else:
-                print(f"No exact match found in scholarly data for {professor_name}")
-        except Exception as e:
-            print(f"Error fetching scholarly data for {professor_name}: {e}")
-
-        try:
-            # 2. Use serpapi to perform a Google search
-            params = {
-                "api_key": SERPAPI_API_KEY,
-                "engine": "google",
-                "q": professor_name,
-                "location": "United States"
-            }
-            search = GoogleSearch(params)
-            results = search.get_dict()
-            professor_data['serpapi'] = results
-            print(f"Retrieved serpapi data for {professor_name}")
-        except Exception as e:
-            print(f"Error fetching serpapi data for {professor_name}: {e}")
-
-        try:
-            # 3. Use Entrez to search for publications in PubMed
-            Entrez.email = ENTREZ_EMAIL  # Required by NCBI
-            handle = Entrez.esearch(db="pubmed", term=f'"{professor_name}"[Author]', retmax=5)
-            record = Entrez.read(handle)
-            id_list = record["IdList"]
-            publications = []
-            for pubmed_id in id_list:
-                handle = Entrez.efetch(db="pubmed", id=pubmed_id, rettype="abstract", retmode="text")
-                abstract = handle.read()
-                publications.append({'pubmed_id': pubmed_id, 'abstract': abstract})
-            professor_data['entrez'] = publications
-            print(f"Retrieved PubMed data for {professor_name}")
-        except Exception as e:
-            print(f"Error fetching Entrez data for {professor_name}: {e}")
-
-        try:
-            # 4. Use Crossref to search for publications
-            cr = Crossref()
-            works = cr.works(query_author=professor_name, limit=5)
-            # Filter results to include only exact author name matches
-            exact_works = []
-            for item in works['message']['items']:
-                authors = item.get('author', [])
-                for author in authors:
-                    author_name = f"{author.get('given', '')} {author.get('family', '')}".strip()
-                    if author_name.lower() == professor_name.lower():
-                        exact_works.append(item)
-                        break
-            professor_data['crossref'] = exact_works
-            print(f"Retrieved Crossref data for {professor_name}")
-        except Exception as e:
-            print(f"Error fetching Crossref data for {professor_name}: {e}")
+                source_status[source] = {'status': 'not_found', 'seconds': elapsed}
+                print(f"No {source} data found for {professor_name}")
+
+    return source_data, source_status
+
+def run_source_call(source, fetch, professor_name):
+    # Start fetch(professor_name) on a daemon thread; returns a Future, or
+    # None when the source already has SOURCE_MAX_UNFINISHED calls running
+    with _source_slots_lock:
+        if source not in _source_slots:
+            _source_slots[source] = threading.BoundedSemaphore(SOURCE_MAX_UNFINISHED)
+        slots = _source_slots[source]
+    if not slots.acquire(blocking=False):
+        return None
+    future = Future()
 
+    def call():
         try:
-            # 5. Use ORCID to fetch author data
-            orcid_data = fetch_orcid_data(professor_name)
-            if orcid_data:
-                professor_data['orcid'] = orcid_data
-                print(f"Retrieved ORCID data for {professor_name}")
-            else:
-                print(f"No ORCID data found for {professor_name}")
-        except Exception as e:
-            print(f"Error fetching ORCID data for {professor_name}: {e}")
-
-        # Save the collected data to a JSON file
-        data_file = os.path.join(professor_dir, 'professor_data.json')
-        with open(data_file, 'w', encoding='utf-8') as f:
-            json.dump(professor_data, f, indent=4)
-        print(f"Saved professor data to {data_file}")
-
-    conn.close()
-
-
-def fetch_orcid_data(professor_name):
-    # ORCID API endpoint for searching
-    search_url = 'https://pub.orcid.org/v3.0/search/'
-
-    headers = {
-        'Accept': 'application/json'
-    }
-
-    # Query to search for the exact name
-    query = f'(given-names:"{professor_name}" OR family-name:"{professor_name}")'
-
+            future.set_result(fetch(professor_name))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            slots.release()
+
+    threading.Thread(target=call, name=f"source-{source}", daemon=True).start()
+    return future
+
+def fetch_scholarly_data(professor_name):
+    # Use scholarly to get author profile and publications (exact name match only)
+    search_query = scholarly.search_author(professor_name)
+    author = next(search_query, None)
+    if author and author['name'].lower() == professor_name.lower():
+        return scholarly.fill(author)
+    return None
+
+def fetch_serpapi_data(professor_name):
+    # Use serpapi to perform a Google search
     params = {
-        'q': query
+        "api_key": SERPAPI_API_KEY,
+        "engine": "google",
+        "q": professor_name,
+        "location": "United States"
     }
+    search = GoogleSearch(params)
+    results = search.get_dict()
+    # Failures (bad key, exhausted quota, ...) come back as a dict with an 'error'
+    if results.get('error'):
+        raise RuntimeError(f"SerpAPI: {results['error']}")
+    return results
+
+def fetch_entrez_data(professor_name):
+    # Use Entrez to search for publications in PubMed (one esearch and one batched efetch)
+    return pubmed_client.fetch_author_publications(professor_name)
+
+def fetch_crossref_data(professor_name):
+    # Use Crossref to search for publications
+    cr = Crossref()
+    works = cr.works(query_author=professor_name, limit=5)
+    # Filter results to include only exact author name matches
+    exact_works = []
+    for item in works['message']['items']:
+        authors = item.get('author', [])
+        for author in authors:
+            author_name = f"{author.get('given', '')} {author.get('family', '')}".strip()
+            if author_name.lower() == professor_name.lower():
+                exact_works.append(item)
+                break
+    return exact_works
 
-    response = requests.get(search_url, headers=headers, params=params)
-
-    if response.status_code == 200:
-        data = response.json()
-        if 'result' in data:
-            for item in data['result']:
-                orcid_id = item['orcid-identifier']['path']
-                # Fetch detailed profile data
-                profile_url = f'https://pub.orcid.org/v3.0/{orcid_id}/record'
-                profile_response = requests.get(profile_url, headers=headers)
-                if profile_response.status_code == 200:
-                    profile_data = profile_response.json()
-                    # Verify exact name match
-                    personal_details = profile_data.get('person', {}).get('name', {})
-                    given_names = personal_details.get('given-names', {}).get('value', '').lower()
-                    family_name = personal_details.get('family-name', {}).get('value', '').lower()
-                    full_name = f"{given_names} {family_name}".strip()
-                    if full_name == professor_name.lower():
-                        return profile_data
-        else:
-            return None
-    else:
-        print(f"ORCID API request failed with status code {response.status_code}")
-        return None
-
-def fetch_links_bfs(base_url, professor_dir, max_depth, saved_pages):
-    visited = set()
-    queue = [(base_url, 0)]
-
-    while queue:
-        current_url, depth = queue.pop(0)
-        if depth > max_depth or current_url in visited or current_url in saved_pages:
-            continue
-
-        visited.add(current_url)
-        try:
-            response = requests.get(current_url)
-            response.raise_for_status()
-            content = response.text
-
-            # Save the page content
-            filename = get_safe_filename(current_url)
-            filepath = os.path.join(professor_dir, filename)
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(content)
-            print(f"Saved page: {current_url}")
-
-            # Add the URL to saved_pages to avoid duplicates
-            saved_pages.add(current_url)
-
-            if depth < max_depth:
-                soup = BeautifulSoup(content, 'html.parser')
-                links = soup.find_all('a', href=True)
-
-                for link in links:
-                    href = link['href']
-                    href = urljoin(current_url, href)
-                    parsed_href = urlparse(href)
-
-                    # Check if the link is on the same domain
-                    if parsed_href.netloc != urlparse(base_url).netloc:
-                        continue
-
-                    if href not in visited and href not in saved_pages:
-                        queue.append((href, depth + 1))
-
-            # Add a small delay
-            time.sleep(random.uniform(0.5, 1.5))
-        except requests.RequestException as e:
-            print(f"Failed to fetch link {current_url}: {e}")
-
-def fetch_links_dfs(base_url, professor_dir, max_depth, saved_pages, visited=None, depth=0):
+def fetch_orcid_data(professor_name):
+    # Use ORCID to fetch author data (name -> iD lookups are cached across runs)
+    return orcid_client.fetch_orcid_data(professor_name)
+
+def fetch_links_bfs(base_url, professor_dir, max_depth, saved_pages, seed_links=None, budget=None,
+                    manifest=None, novelty=None):
+    # Crawl level by level. Each level comes out of the frontier most relevant
+    # link first and is fetched concurrently, so a level takes as long as its
+    # slowest page; the crawl stops once any limit of the budget runs out.
+    # With a novelty tracker, it also stops after a level whose pages added
+    # less than NOVELTY_THRESHOLD new text.
+    if budget is None:
+        budget = new_crawl_budget()
+    saved_lock = threading.Lock()
+    seed_key = canonicalize_url(base_url)
+
+    # The seed is usually already saved (and parsed) as main_page.html; its
+    # links are still expanded, it is just not fetched or written again
+    frontier = CrawlFrontier()
+    frontier.push(base_url, 0)
+    for url in saved_pages:
+        frontier.mark_seen(url)
+
+    with ThreadPoolExecutor(max_workers=CRAWL_CONCURRENCY) as executor:
+        while frontier:
+            level, depth = frontier.pop_level()
+            if depth > max_depth:
+                break
+
+            batch = []
+            for url, score in level:
+                if depth == 0 and canonicalize_url(url) == seed_key:
+                    batch.append((url, seed_links))
+                    continue
+                if not budget.take_page():
+                    break
+                batch.append((url, None))
+
+            futures = [
+                executor.submit(fetch_page, url, professor_dir, saved_pages, saved_lock, links,
+                                manifest, depth, budget, novelty)
+                for url, links in batch
+            ]
+
+            for future in futures:
+                links = future.result()
+                if not links or depth >= max_depth:
+                    continue
+                for href, anchor_text in links:
+                    frontier.push(href, depth + 1, anchor_text)
+
+            if budget.check():
+                break
+            if novelty is not None and depth > 0 and depth < max_depth:
+                level_novelty = novelty.novelty(url for url, links in batch)
+                if level_novelty < NOVELTY_THRESHOLD:
+                    print(f"Depth {depth} of {base_url} added {level_novelty:.0%} new text; not going deeper")
+                    break
+
+    report_budget(budget, base_url)
+
+def fetch_links_dfs(base_url, professor_dir, max_depth, saved_pages, visited=None, depth=0, seed_links=None, budget=None,
+                    manifest=None, novelty=None):
+    # Every discovered link is submitted as soon as its parent page is parsed,
+    # most relevant first, so independent branches are crawled in parallel; as
+    # in the recursive version, the first path that reaches a URL claims it.
+    # With a novelty tracker, a branch is not followed past a page that added
+    # less than NOVELTY_THRESHOLD new text.
     if depth > max_depth:
         return
     if visited is None:
         visited = set()
+    if budget is None:
+        budget = new_crawl_budget()
+
+    saved_lock = threading.Lock()
+    saved_keys = {canonicalize_url(url) for url in saved_pages}
+    pending = {}
+
+    with ThreadPoolExecutor(max_workers=CRAWL_CONCURRENCY) as executor:
+        def schedule(url, url_depth, links=None):
+            key = canonicalize_url(url)
+            if url_depth > max_depth or key in visited:
+                return
+            if key in saved_keys and links is None and url_depth > depth:
+                return
+            if links is None and not budget.take_page():
+                return
+            visited.add(key)
+            future = executor.submit(fetch_page, url, professor_dir, saved_pages, saved_lock, links,
+                                     manifest, url_depth, budget, novelty)
+            pending[future] = (url, url_depth)
+
+        schedule(base_url, depth, seed_links)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                url, url_depth = pending.pop(future)
+                links = future.result()
+                if not links or url_depth >= max_depth or budget.check():
+                    continue
+                if novelty is not None and url_depth > depth:
+                    page_novelty = novelty.page_novelty(url)
+                    if page_novelty is not None and page_novelty < NOVELTY_THRESHOLD:
+                        continue
+                links = sorted(links, key=lambda link: score_link(link[0], link[1]), reverse=True)
+                for href, anchor_text in links:
+                    schedule(href, url_depth + 1)
+
+    report_budget(budget, base_url)
+
+def new_crawl_budget():
+    return CrawlBudget(CRAWL_PAGE_BUDGET, CRAWL_BYTE_BUDGET, CRAWL_TIME_BUDGET)
+
+def report_budget(budget, base_url):
+    if budget.exhausted:
+        print(f"Crawl of {base_url} stopped: {budget.exhausted} budget exhausted "
+              f"({budget.pages_used} pages, {budget.bytes_used} bytes)")
+
+def fetch_discovered(urls, professor_dir, saved_pages, budget, manifest=None, novelty=None):
+    # Fetch pages found by discovery, in the order given, within the crawl budget.
+    # They count as depth 1; the link crawl skips them afterwards.
+    saved_lock = threading.Lock()
+    with ThreadPoolExecutor(max_workers=CRAWL_CONCURRENCY) as executor:
+        futures = []
+        for url in urls:
+            if not budget.take_page():
+                break
+            futures.append(executor.submit(fetch_page, url, professor_dir, saved_pages, saved_lock, None,
+                                           manifest, 1, budget, novelty))
+        for future in futures:
+            future.result()
+
+def fetch_page(url, professor_dir, saved_pages, saved_lock, links=None, manifest=None, depth=None, budget=None,
+               novelty=None):
+    # Fetch and save a single crawled page, returning its links (None on failure).
+    # When the links are passed in (the already saved seed page), nothing is fetched.
+    # Every outcome is recorded in the professor's crawl manifest, and pages the
+    # manifest holds as recent are read back from disk instead of being fetched.
+    if links is not None:
+        return links
+
+    fresh = manifest.fresh_entry(url) if manifest else None
+    if fresh:
+        with saved_lock:
+            saved_pages.add(url)
+        if not fresh['filename'] or not fresh['filename'].endswith('.html'):
+            return None
+        filepath = os.path.join(professor_dir, fresh['filename'])
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return process_html(f.read(), filepath, url, False, novelty)
 
-    if base_url in visited or base_url in saved_pages:
-        return
-
-    visited.add(base_url)
     try:
-        response = requests.get(base_url)
-        response.raise_for_status()
-        content = response.text
-
-        # Save the page content
-        filename = get_safe_filename(base_url)
+        if page_cache.fetched_this_run(url):
+            # Already downloaded for another professor; served from the page store
+            page = page_cache.fetch(url)
+        else:
+            if not http_client.robots_allowed(url):
+                print(f"Skipped {url}: disallowed by robots.txt")
+                record_crawl(manifest, url, None, None, 'disallowed', depth)
+                return None
+            # Pacing is left to the per-host rate limiter in http_client
+            with host_slot(url), _request_slots:
+                page = page_cache.fetch(url)
+
+        # Save the page content, unless the cached copy is still current
+        if page.kind == 'pdf':
+            # Linked PDFs (papers, CVs) are kept as PDFs and not parsed for links
+            filename = get_safe_filename(url, '.pdf')
+            content = None
+        else:
+            filename = get_safe_filename(url)
+            content = page.text
         filepath = os.path.join(professor_dir, filename)
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
-        print(f"Saved page: {base_url}")
+        changed = page.changed or not os.path.exists(filepath)
+        if changed:
+            if content is None:
+                page.save_bytes(filepath)
+            else:
+                page_store.save_text(content, filepath)
+            print(f"Saved page: {url}")
+        else:
+            print(f"Page unchanged: {url}")
+        if budget is not None:
+            budget.add_bytes(os.path.getsize(filepath))
+        record_crawl(manifest, url, filename, page.body_hash, 'ok', depth)
 
         # Add the URL to saved_pages to avoid duplicates
-        saved_pages.add(base_url)
-
-        if depth < max_depth:
-            soup = BeautifulSoup(content, 'html.parser')
-            links = soup.find_all('a', href=True)
-
-            for link in links:
-                href = link['href']
-                href = urljoin(base_url, href)
-                parsed_href = urlparse(href)
+        with saved_lock:
+            saved_pages.add(url)
+        if content is None:
+            return None
+        return process_html(content, filepath, url, changed, novelty)
+    except page_cache.UnwantedContent as e:
+        print(e)
+        record_crawl(manifest, url, None, None, 'skipped', depth)
+        return None
+    except requests.RequestException as e:
+        print(f"Failed to fetch link {url}: {e}")
+        record_crawl(manifest, url, None, None, 'error', depth)
+        return None
 
-                # Check if the link is on the same domain
-                if parsed_href.netloc != urlparse(base_url).netloc:
-                    continue
+def record_crawl(manifest, url, filename, content_hash, status, depth):
+    if manifest is not None:
+        manifest.record(url, filename, content_hash, status, depth)
+
+def process_html(content, filepath, page_url, changed=True, novelty=None):
+    # Parse a saved page once: write its readable text next to it (as
+    # <file>.html.txt, which modifier.summarize_htmls reads) and return its links.
+    # The text is also added to the crawl's novelty tracker, if any.
+    links, text = parse_html(content, page_url)
+    if novelty is not None:
+        novelty.add(page_url, text)
+    text_filepath = filepath + '.txt'
+    source = content.encode('utf-8')
+    if changed or page_store.read_derived_text(text_filepath, source) is None:
+        page_store.save_derived_text(text, text_filepath, source)
+    return links
+
+def parse_html(content, page_url, base_netloc=None):
+    # Single lxml pass over a page. Returns its absolute same-domain links with
+    # their anchor text, in document order, and its text without scripts,
+    # navigation and other page furniture.
+    if base_netloc is None:
+        base_netloc = urlparse(page_url).netloc
+    try:
+        # lxml parsers are not safe to share between crawler threads
+        parser = lxml.html.HTMLParser(encoding='utf-8')
+        root = lxml.html.document_fromstring(content.encode('utf-8'), parser=parser)
+    except (etree.ParserError, ValueError):
+        # Empty or unparsable document
+        return [], ''
+
+    links = []
+    for link in root.iter('a'):
+        if not link.get('href'):
+            continue
+        href = urljoin(page_url, link.get('href').strip())
+        parsed_href = urlparse(href)
 
-                if href not in visited and href not in saved_pages:
-                    fetch_links_dfs(href, professor_dir, max_depth, saved_pages, visited, depth + 1)
+        # Check if the link is on the same domain
+        if parsed_href.netloc != base_netloc or parsed_href.scheme not in ('http', 'https'):
+            continue
 
-        # Add a small delay
-        time.sleep(random.uniform(0.5, 1.5))
-    except requests.RequestException as e:
-        print(f"Failed to fetch link {base_url}: {e}")
+        # Media and archives are never useful; skip them without a request
+        if parsed_href.path.lower().endswith(SKIPPED_EXTENSIONS):
+            continue
 
-def get_safe_filename(url):
-    # Create a safe filename from the URL
+        links.append((href, ' '.join(link.text_content().split())))
+
+    # The text following a removed element is kept, separated from the text
+    # before it ("Brain<!-- -->Imaging" is two words)
+    for element in root.iter(etree.Comment, *TEXT_SKIPPED_TAGS):
+        if element.tail:
+            element.tail = ' ' + element.tail
+    etree.strip_elements(root, etree.Comment, *TEXT_SKIPPED_TAGS, with_tail=False)
+    text = ' '.join(' '.join(root.itertext()).split())
+    return links, text
+
+def host_slot(url):
+    # Per-host politeness: at most CRAWL_PER_HOST_LIMIT requests in flight per host
+    host = urlparse(url).netloc.lower()
+    with _host_slots_lock:
+        if host not in _host_slots:
+            _host_slots[host] = threading.BoundedSemaphore(CRAWL_PER_HOST_LIMIT)
+        return _host_slots[host]
+
+def legacy_filename(url):
+    # The name earlier versions saved a crawled page under: the bare slug of its path
+    path = urlparse(url).path.strip('/') or 'index'
+    return re.sub(r'[^a-zA-Z0-9_\-]', '_', path) + '.html'
+
+def remove_legacy_pages(professor_dir, manifest):
+    # Drop the copy an earlier version saved of a page (and the text extracted
+    # from it) once the page is saved under its current name, so the old copy
+    # is not summarized along with the new one
+    files = manifest.files()
+    for filename, url in files.items():
+        if not filename.endswith('.html'):
+            continue
+        legacy = legacy_filename(url)
+        if legacy == filename or legacy in files:
+            continue
+        for path in (os.path.join(professor_dir, legacy), os.path.join(professor_dir, legacy + '.txt')):
+            if os.path.exists(path):
+                os.remove(path)
+                print(f"Removed {os.path.basename(path)}, saved by an earlier version as {filename}")
+
+def get_safe_filename(url, extension='.html'):
+    # Create a safe filename from the URL: a readable slug of the path plus a
+    # digest of the whole canonical URL, so pages that differ only by query
+    # string or subdomain (every 'index') never overwrite each other
     parsed_url = urlparse(url)
     path = parsed_url.path.strip('/')
     if not path:
         path = 'index'
-    safe_path = re.sub(r'[^a-zA-Z0-9_\-]', '_', path)
-    filename = f"{safe_path}.html"
+    safe_path = re.sub(r'[^a-zA-Z0-9_\-]', '_', path)[:80]
+    digest = hashlib.sha1(canonicalize_url(url).encode('utf-8')).hexdigest()[:10]
+    filename = f"{safe_path}_{digest}{extension}"
     return filename
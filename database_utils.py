@@ -114,6 +114,7 @@ def create_tables(conn, table_name):
             "reminder2" INTEGER,
             "reminder_interval_3" INTEGER,
             "reminder3" INTEGER,
+            "crawl_budget_exhausted" TEXT,
             FOREIGN KEY("ID") REFERENCES "{table_name}"("ID"),
             FOREIGN KEY("Email") REFERENCES "{table_name}"("Email"),
             FOREIGN KEY("search_style") REFERENCES "search_style_dict"("search_style"),
@@ -122,4 +123,16 @@ def create_tables(conn, table_name):
         )
     ''')
 
+    # Columns added after the table was first released; older databases get them here
+    add_missing_columns(cursor, f"{table_name}_chronology", {
+        "crawl_budget_exhausted": "TEXT",
+    })
+
     conn.commit()
+
+def add_missing_columns(cursor, table, columns):
+    cursor.execute(f'PRAGMA table_info("{table}")')
+    existing = {row[1] for row in cursor.fetchall()}
+    for column, column_type in columns.items():
+        if column not in existing:
+            cursor.execute(f'ALTER TABLE "{table}" ADD COLUMN "{column}" {column_type}')
@@ -0,0 +1,192 @@
+# discovery.py
+
+import io
+import gzip
+import threading
+import datetime
+from email.utils import parsedate_to_datetime
+from urllib.parse import urljoin, urlparse, parse_qsl
+import lxml.html
+from lxml import etree
+import requests
+import http_client
+import page_cache
+from url_utils import canonicalize_url
+import config
+
+# Sitemap and feed discovery settings (optional in config.py)
+SITEMAP_DISCOVERY = getattr(config, 'SITEMAP_DISCOVERY', True)  # Look for sitemaps and feeds before crawling links
+SITEMAP_MAX_FILES = getattr(config, 'SITEMAP_MAX_FILES', 10)  # Sitemaps and feeds read per professor
+SITEMAP_MAX_URLS = getattr(config, 'SITEMAP_MAX_URLS', 30)  # Discovered pages fetched per professor, newest first
+SITEMAP_MAX_UNCOMPRESSED = 50 * 1024 * 1024  # Largest sitemap the protocol allows; gzip sitemaps are cut off there
+
+FEED_TYPES = ('application/rss+xml', 'application/atom+xml')
+DIRECTORY_PAGES = ('index', 'default', 'home', 'main')
+
+# Parsed sitemaps and feeds of this run: canonical URL -> (page entries, child sitemaps).
+# Professors of the same university share these files.
+_parsed = {}
+_parsed_lock = threading.Lock()
+
+def discover_urls(webpage_url, main_page_content=None):
+    # Pages under the professor's webpage listed in the site's sitemaps
+    # (from robots.txt and /sitemap.xml) and in the feeds the main page
+    # advertises, most recently modified first. Entries without a date come last.
+    if not SITEMAP_DISCOVERY or not webpage_url:
+        return []
+    parsed_url = urlparse(webpage_url)
+    origin = f"{parsed_url.scheme}://{parsed_url.netloc}"
+
+    candidates = list(http_client.robots_sitemaps(webpage_url))
+    candidates.append(f"{origin}/sitemap.xml")
+    if main_page_content:
+        candidates.extend(feed_links(main_page_content, webpage_url))
+
+    found = {}
+    seen = set()
+    files_read = 0
+    while candidates and files_read < SITEMAP_MAX_FILES:
+        candidate = candidates.pop(0)
+        key = canonicalize_url(candidate)
+        if key in seen:
+            continue
+        seen.add(key)
+        files_read += 1
+        entries, children = _read(candidate)
+        candidates.extend(children)
+        for url, lastmod in entries:
+            if not in_scope(url, webpage_url):
+                continue
+            url_key = canonicalize_url(url)
+            if url_key not in found or (lastmod or 0) > (found[url_key][1] or 0):
+                found[url_key] = (url, lastmod)
+
+    found.pop(canonicalize_url(webpage_url), None)
+    urls = sorted(found.values(), key=lambda entry: entry[1] or 0, reverse=True)
+    return [url for url, lastmod in urls[:SITEMAP_MAX_URLS]]
+
+def in_scope(url, webpage_url):
+    # Same host, and under the professor's page: /people/smith.html covers
+    # /people/smith/..., /lab/index.html covers /lab/..., a site root the whole host.
+    # A page identified by its query (profile.php?id=123) covers only the same
+    # page with the same parameters (profile.php?id=123&tab=publications), not
+    # the profiles of the rest of the faculty.
+    parsed = urlparse(url)
+    base = urlparse(webpage_url)
+    if parsed.scheme not in ('http', 'https') or parsed.netloc.lower() != base.netloc.lower():
+        return False
+    if base.query:
+        base_params = set(parse_qsl(base.query, keep_blank_values=True))
+        return parsed.path == base.path and base_params <= set(parse_qsl(parsed.query, keep_blank_values=True))
+    prefix = base.path.rstrip('/')
+    last_segment = prefix.rsplit('/', 1)[-1]
+    if '.' in last_segment:
+        stem = last_segment.rsplit('.', 1)[0]
+        # index.html and the like stand for their directory
+        prefix = prefix[:len(prefix) - len(last_segment)] + ('' if stem.lower() in DIRECTORY_PAGES else stem)
+        prefix = prefix.rstrip('/')
+    path = parsed.path
+    return not prefix or path == prefix or path.startswith((prefix + '/', prefix + '.'))
+
+def feed_links(content, page_url):
+    # RSS/Atom feeds advertised with <link rel="alternate"> on a page
+    try:
+        root = lxml.html.document_fromstring(content.encode('utf-8'),
+                                             parser=lxml.html.HTMLParser(encoding='utf-8'))
+    except (etree.ParserError, ValueError):
+        return []
+    feeds = []
+    for link in root.iter('link'):
+        rel = (link.get('rel') or '').lower().split()
+        if 'alternate' in rel and (link.get('type') or '').lower() in FEED_TYPES and link.get('href'):
+            feeds.append(urljoin(page_url, link.get('href').strip()))
+    return feeds
+
+def parse_document(content, base_url):
+    # Returns ([(url, lastmod timestamp or None)], [child sitemap URLs]) for a
+    # sitemap, sitemap index, RSS or Atom document
+    parser = etree.XMLParser(recover=True, resolve_entities=False, no_network=True)
+    try:
+        root = etree.fromstring(content, parser=parser)
+    except etree.XMLSyntaxError:
+        return [], []
+    if root is None:
+        return [], []
+
+    entries, children = [], []
+    kind = _local_name(root)
+    if kind == 'sitemapindex':
+        for sitemap in _children(root, 'sitemap'):
+            loc = _child_text(sitemap, 'loc')
+            if loc:
+                children.append(urljoin(base_url, loc))
+    elif kind == 'urlset':
+        for url in _children(root, 'url'):
+            loc = _child_text(url, 'loc')
+            if loc:
+                entries.append((urljoin(base_url, loc), _parse_date(_child_text(url, 'lastmod'))))
+    elif kind == 'rss':
+        for item in root.iter('item'):
+            link = _child_text(item, 'link')
+            if link:
+                entries.append((urljoin(base_url, link), _parse_date(_child_text(item, 'pubDate'))))
+    elif kind == 'feed':
+        for entry in _children(root, 'entry'):
+            href = None
+            for link in _children(entry, 'link'):
+                if link.get('rel', 'alternate') == 'alternate' and link.get('href'):
+                    href = link.get('href')
+                    break
+            if href:
+                date = _child_text(entry, 'updated') or _child_text(entry, 'published')
+                entries.append((urljoin(base_url, href), _parse_date(date)))
+    return entries, children
+
+def _read(url):
+    key = canonicalize_url(url)
+    with _parsed_lock:
+        if key in _parsed:
+            return _parsed[key]
+    try:
+        page = page_cache.fetch(url, accept=('xml', 'gzip'))
+        content = page.content
+        if page.kind == 'gzip':
+            # Sitemaps are often served compressed (sitemap.xml.gz)
+            with gzip.GzipFile(fileobj=io.BytesIO(content)) as f:
+                content = f.read(SITEMAP_MAX_UNCOMPRESSED)
+        result = parse_document(content, url)
+    except (requests.RequestException, OSError, EOFError):
+        # No sitemap there, not XML (many sites answer with an HTML page) or a broken gzip file
+        result = ([], [])
+    with _parsed_lock:
+        _parsed[key] = result
+    return result
+
+def _local_name(element):
+    if not isinstance(element.tag, str):
+        return ''
+    return etree.QName(element).localname
+
+def _children(element, name):
+    return [child for child in element if _local_name(child) == name]
+
+def _child_text(element, name):
+    for child in element:
+        if _local_name(child) == name:
+            return (child.text or '').strip()
+    return ''
+
+def _parse_date(value):
+    # W3C datetime (sitemaps, Atom) or RFC 822 (RSS) -> timestamp
+    if not value:
+        return None
+    try:
+        date = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        try:
+            date = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=datetime.timezone.utc)
+    return date.timestamp()
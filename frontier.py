@@ -0,0 +1,83 @@
+# frontier.py
+
+import re
+import heapq
+import itertools
+from urllib.parse import urlparse, unquote
+from url_utils import canonicalize_url
+
+# Words in a link's anchor text or path that point to research content (weight added to the score)
+RELEVANT_KEYWORDS = {
+    'research': 5, 'publication': 5, 'publications': 5, 'papers': 4, 'paper': 3,
+    'project': 3, 'projects': 3, 'lab': 3, 'laboratory': 3, 'interests': 3,
+    'cv': 4, 'vita': 4, 'resume': 2, 'bio': 2, 'biography': 2, 'about': 1,
+    'people': 1, 'team': 1, 'members': 1, 'group': 2, 'students': 1,
+    'grants': 2, 'funding': 1, 'software': 2, 'data': 1, 'datasets': 2,
+    'teaching': 1, 'courses': 1, 'scholar': 2, 'pubmed': 2, 'articles': 3,
+    'preprints': 3, 'books': 2, 'talks': 1, 'positions': 2, 'join': 2, 'openings': 2,
+}
+
+# Words that mark pages with no value for the outreach notes (weight subtracted from the score)
+IRRELEVANT_KEYWORDS = {
+    'events': 4, 'event': 4, 'calendar': 4, 'parking': 6, 'directions': 5, 'map': 4,
+    'maps': 4, 'login': 6, 'logout': 6, 'signin': 6, 'sso': 6, 'donate': 6, 'giving': 5,
+    'admissions': 3, 'apply': 2, 'tuition': 5, 'privacy': 6, 'accessibility': 6,
+    'cookies': 6, 'sitemap': 3, 'search': 3, 'contact': 2, 'careers': 4, 'jobs': 3,
+    'alumni': 3, 'athletics': 6, 'covid': 4, 'emergency': 5, 'newsletter': 3,
+    'tag': 3, 'tags': 3, 'category': 3, 'feed': 4, 'rss': 4, 'print': 4, 'share': 4,
+}
+
+_word_re = re.compile(r'[a-z]+')
+
+def score_link(url, anchor_text=''):
+    # Relevance of a link from its anchor text and URL path; higher is fetched first
+    words = _word_re.findall(anchor_text.lower())
+    words += _word_re.findall(unquote(urlparse(url).path).lower())
+    score = 0
+    for word in set(words):
+        score += RELEVANT_KEYWORDS.get(word, 0)
+        score -= IRRELEVANT_KEYWORDS.get(word, 0)
+    return score
+
+class CrawlFrontier:
+    # Priority queue of URLs to crawl. Entries are ordered by depth first, so the
+    # crawl keeps its breadth-first levels, then by relevance score within a level.
+    # URLs are deduplicated on their canonical form and enter the frontier at most
+    # once; the URL as linked is what gets fetched, so relative links keep resolving.
+
+    def __init__(self):
+        self._heap = []
+        self._seen = set()
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, url, depth, anchor_text=''):
+        key = canonicalize_url(url)
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        heapq.heappush(self._heap, (depth, -score_link(key, anchor_text), next(self._counter), url))
+        return True
+
+    def mark_seen(self, url):
+        self._seen.add(canonicalize_url(url))
+
+    def is_seen(self, url):
+        return canonicalize_url(url) in self._seen
+
+    def pop(self):
+        depth, neg_score, _, url = heapq.heappop(self._heap)
+        return url, depth, -neg_score
+
+    def pop_level(self):
+        # Pop every entry at the shallowest depth, most relevant first
+        level = []
+        if not self._heap:
+            return level, None
+        depth = self._heap[0][0]
+        while self._heap and self._heap[0][0] == depth:
+            url, _, score = self.pop()
+            level.append((url, score))
+        return level, depth
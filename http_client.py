@@ -0,0 +1,255 @@
+# http_client.py
+
+import socket
+import threading
+import time
+import datetime
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+import requests
+from requests.adapters import HTTPAdapter
+from rate_limiter import HostRateLimiter
+import config
+
+# HTTP client settings (optional in config.py)
+HTTP_CONNECT_TIMEOUT = getattr(config, 'HTTP_CONNECT_TIMEOUT', 5)  # Seconds to establish a connection
+HTTP_READ_TIMEOUT = getattr(config, 'HTTP_READ_TIMEOUT', 30)  # Seconds to wait between bytes of the response
+HTTP_POOL_CONNECTIONS = getattr(config, 'HTTP_POOL_CONNECTIONS', 64)  # Number of hosts kept in the pool
+HTTP_POOL_MAXSIZE = getattr(config, 'HTTP_POOL_MAXSIZE', 32)  # Keep-alive connections kept per host
+HTTP2_ENABLED = getattr(config, 'HTTP2_ENABLED', False)  # Use httpx with HTTP/2 when it is installed
+DNS_CACHE_TTL = getattr(config, 'DNS_CACHE_TTL', 300)  # Seconds to reuse a resolved address
+
+# Per-host rate limiting (optional in config.py)
+HOST_RATE = getattr(config, 'HOST_RATE', 1.0)  # Requests per second to any one host
+HOST_BURST = getattr(config, 'HOST_BURST', 2)  # Requests a host may receive back to back
+HOST_RATE_OVERRIDES = getattr(config, 'HOST_RATE_OVERRIDES', {'pub.orcid.org': 12})  # Hosts with their own rate
+HTTP_MAX_RETRIES = getattr(config, 'HTTP_MAX_RETRIES', 2)  # Retries of a request answered with 429/503
+ROBOTS_TXT_ENABLED = getattr(config, 'ROBOTS_TXT_ENABLED', True)  # Obey robots.txt rules and Crawl-delay when crawling
+THROTTLE_STATUSES = (429, 503)
+
+DEFAULT_TIMEOUT = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+_client = None
+_client_lock = threading.Lock()
+
+_dns_cache = {}
+_dns_cache_lock = threading.Lock()
+_original_getaddrinfo = socket.getaddrinfo
+
+_limiter = HostRateLimiter(HOST_RATE, HOST_BURST, HOST_RATE_OVERRIDES)
+
+_robots = {}
+_robots_lock = threading.Lock()
+
+def get(url, headers=None, params=None, timeout=None, stream=False, allow_redirects=True):
+    # Single entry point for every HTTP GET of the project. Failures always
+    # surface as requests.RequestException, whichever backend is in use.
+    # Each request waits for its host's rate limiter; a 429/503 slows the
+    # host down and is retried after its Retry-After (or a growing backoff).
+    if timeout is None:
+        timeout = DEFAULT_TIMEOUT
+    host = urlparse(url).netloc.lower()
+    client = get_client()
+    for attempt in range(HTTP_MAX_RETRIES + 1):
+        _limiter.acquire(host)
+        if isinstance(client, requests.Session):
+            response = client.get(url, headers=headers, params=params, timeout=timeout,
+                                  stream=stream, allow_redirects=allow_redirects)
+        else:
+            response = _http2_get(client, url, headers, params, timeout, stream, allow_redirects)
+        if response.status_code not in THROTTLE_STATUSES:
+            _limiter.success(host)
+            return response
+
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        delay = _limiter.throttle(host, retry_after)
+        if attempt == HTTP_MAX_RETRIES or (retry_after is not None and retry_after > delay):
+            # Out of retries, or the server wants us gone for longer than we wait
+            return response
+        print(f"{host} answered {response.status_code}; retrying in {delay:.1f}s")
+        response.close()
+    return response
+
+def parse_retry_after(value):
+    # Retry-After is either a number of seconds or an HTTP date
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, (retry_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+def robots_allowed(url, user_agent='*'):
+    # Whether robots.txt lets crawlers fetch 'url'. The host's Crawl-delay,
+    # if any, is applied to its rate limiter the first time it is seen.
+    if not ROBOTS_TXT_ENABLED:
+        return True
+    parser = _robots_parser(url, user_agent)
+    return parser is None or parser.can_fetch(user_agent, url)
+
+def robots_sitemaps(url):
+    # Sitemap URLs listed in the robots.txt of the host of 'url'
+    if not ROBOTS_TXT_ENABLED:
+        return []
+    parser = _robots_parser(url, '*')
+    return (parser.site_maps() or []) if parser is not None else []
+
+def _robots_parser(url, user_agent):
+    # robots.txt is fetched once per host and run; concurrent callers wait for it
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    with _robots_lock:
+        entry = _robots.get(host)
+        if entry is None:
+            entry = _robots[host] = {'parser': None, 'ready': threading.Event()}
+            owner = True
+        else:
+            owner = False
+    if owner:
+        try:
+            entry['parser'] = _load_robots(f"{parsed.scheme}://{parsed.netloc}/robots.txt", host, user_agent)
+        finally:
+            entry['ready'].set()
+    else:
+        entry['ready'].wait()
+    return entry['parser']
+
+def _load_robots(robots_url, host, user_agent):
+    # A missing or unreadable robots.txt allows everything
+    try:
+        response = get(robots_url)
+    except requests.RequestException:
+        return None
+    try:
+        if response.status_code != 200:
+            return None
+        parser = RobotFileParser(robots_url)
+        parser.parse(response.text.splitlines())
+    finally:
+        response.close()
+    delay = parser.crawl_delay(user_agent)
+    rate = parser.request_rate(user_agent)
+    if rate and rate.requests:
+        delay = max(delay or 0, rate.seconds / rate.requests)
+    _limiter.set_crawl_delay(host, delay)
+    return parser
+
+def get_client():
+    # Lazily build the shared client; connections are reused across threads and professors
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                enable_dns_cache()
+                _client = _create_http2_client() if HTTP2_ENABLED else None
+                if _client is None:
+                    _client = _create_session()
+    return _client
+
+def close_client():
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+def _create_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def _create_http2_client():
+    try:
+        import httpx
+        import h2  # noqa: F401  (httpx needs it for HTTP/2)
+    except ImportError:
+        print("HTTP2_ENABLED is set but httpx[http2] is not installed; falling back to HTTP/1.1")
+        return None
+    limits = httpx.Limits(max_connections=HTTP_POOL_CONNECTIONS * HTTP_POOL_MAXSIZE,
+                          max_keepalive_connections=HTTP_POOL_MAXSIZE)
+    return httpx.Client(http2=True, limits=limits)
+
+def _http2_get(client, url, headers, params, timeout, stream, allow_redirects):
+    import httpx
+    connect_timeout, read_timeout = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+    try:
+        request = client.build_request(
+            'GET', url, headers=headers, params=params,
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout)
+        )
+        response = client.send(request, stream=stream, follow_redirects=allow_redirects)
+    except httpx.TimeoutException as e:
+        raise requests.Timeout(str(e))
+    except httpx.HTTPError as e:
+        raise requests.ConnectionError(str(e))
+    return Http2Response(response)
+
+class Http2Response:
+    # Wraps an httpx response with the subset of the requests.Response API used in the project
+
+    def __init__(self, response):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.url = str(response.url)
+        self.reason = response.reason_phrase
+        self.encoding = response.encoding
+
+    @property
+    def content(self):
+        return self._response.read()
+
+    @property
+    def text(self):
+        self._response.read()
+        return self._response.text
+
+    def json(self):
+        self._response.read()
+        return self._response.json()
+
+    def iter_content(self, chunk_size=None):
+        import httpx
+        try:
+            for chunk in self._response.iter_bytes(chunk_size):
+                yield chunk
+        except httpx.HTTPError as e:
+            raise requests.ConnectionError(str(e))
+
+    def raise_for_status(self):
+        if 400 <= self.status_code < 600:
+            raise requests.HTTPError(f"{self.status_code} {self.reason} for url: {self.url}", response=self)
+
+    def close(self):
+        self._response.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+def enable_dns_cache():
+    # Cache name resolution in-process; most traffic goes to a handful of university hosts
+    socket.getaddrinfo = _cached_getaddrinfo
+
+def _cached_getaddrinfo(host, port, family=0, type=0, proto=0, flags=0):
+    key = (host, port, family, type, proto, flags)
+    now = time.monotonic()
+    with _dns_cache_lock:
+        entry = _dns_cache.get(key)
+        if entry and entry[0] > now:
+            return entry[1]
+    result = _original_getaddrinfo(host, port, family, type, proto, flags)
+    with _dns_cache_lock:
+        _dns_cache[key] = (now + DNS_CACHE_TTL, result)
+    return result
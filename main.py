@@ -5,6 +5,7 @@
 import argparse
 import data_gathering
 import data_filtering
+import publication_index
 import modifier
 import database_utils
 import send_email
@@ -22,11 +23,7 @@ from config import (
     DB_FILE,
     TEST_RUN,
     TEST_EMAIL,
-    REMINDER_INTERVAL_1,
-    REMINDER_INTERVAL_2,
-    REMINDER_INTERVAL_3,
     SENDING_METHOD,
-    SEARCH_STYLE,
     # Removed EMAIL_ACCOUNTS from config.py
     # Add other configurations as needed
 )
@@ -45,6 +42,14 @@ def parse_arguments():
                         help='Project directory for storing data.')
     parser.add_argument('-e', '--email-account',
                         help='Email account to use (from_email). If not specified, a random account will be used.')
+    parser.add_argument('-g', '--gather-all', action='store_true',
+                        help='Gather data for every professor not gathered yet, in parallel, then exit.')
+    parser.add_argument('-f', '--filter-all', action='store_true',
+                        help='Filter data for every gathered professor not filtered yet, in parallel, then exit.')
+    parser.add_argument('-s', '--search-publications', metavar='QUERY',
+                        help='List professors whose indexed publications match a full-text query, then exit.')
+    parser.add_argument('-w', '--workers', type=int,
+                        help='Number of professors gathered or filtered in parallel with --gather-all/--filter-all.')
     return parser.parse_args()
 
 def main():
@@ -81,6 +86,33 @@ def main():
     database_utils.create_tables(conn, table_name)
     logging.info("Database tables ensured.")
 
+    if args.gather_all:
+        # Batch pre-gathering; progress is checkpointed, so an interrupted run can simply be restarted
+        logging.info("Gathering data for all professors")
+        data_gathering.main(db_file, table_name, project_directory, search_depth, workers=args.workers)
+        conn.close()
+        logging.info("Data gathering completed for all professors.")
+        return
+
+    if args.search_publications:
+        # Pick professors by topic from the publication index built during filtering
+        publication_index.open_index(project_directory)
+        try:
+            for professor, title, year in publication_index.search(args.search_publications):
+                print(f"{professor}\t{year or ''}\t{title}")
+        except sqlite3.OperationalError as e:
+            logging.error(f"Invalid search query '{args.search_publications}': {e}")
+        conn.close()
+        return
+
+    if args.filter_all:
+        # Batch re-filtering, e.g. after a mass re-gather; uses a pool of processes
+        logging.info("Filtering data for all gathered professors")
+        data_filtering.filter_all(db_file, table_name, project_directory, workers=args.workers)
+        conn.close()
+        logging.info("Data filtering completed for all gathered professors.")
+        return
+
     # Fetch email accounts from the database
     cursor.execute('''
         SELECT "ID", "from_email" FROM email_accounts
@@ -143,26 +175,9 @@ def main():
             data_gathering_completed = result[0] if result else False
 
             if not data_gathering_completed:
-                # Call data_gathering module
+                # Call data_gathering module; it checkpoints the chronology table
+                # (including any crawl budget that ran out) once the professor is gathered
                 data_gathering.main(db_file, table_name, project_directory, search_depth, professor_id)
-                # Update the chronology table
-                cursor.execute(f'''
-                    INSERT OR REPLACE INTO "{chronology_table}" (
-                        "ID", "Email", "search_style", "search_depth", "search_date",
-                        "data_gathering_completed", "reminder_interval_1", "reminder_interval_2", "reminder_interval_3"
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    professor_id,
-                    professor_email,
-                    SEARCH_STYLE,
-                    search_depth,
-                    int(datetime.datetime.now().timestamp()),
-                    True,
-                    REMINDER_INTERVAL_1,
-                    REMINDER_INTERVAL_2,
-                    REMINDER_INTERVAL_3
-                ))
-                conn.commit()
                 logging.info(f"Data gathering completed for Professor ID {professor_id}")
 
             # Similarly, check and perform data filtering
@@ -12,6 +12,12 @@ import logging
 import sqlite3
 import time
 from config import OPENAI_API_KEY
+import config
+import page_store
+from crawl_manifest import CrawlManifest, MANIFEST_FILENAME
+
+# PDF text extraction (optional in config.py)
+PDF_MAX_PAGES = getattr(config, 'PDF_MAX_PAGES', 10)  # Pages extracted per PDF; title, abstract and intro (0 = all)
 
 # Set OpenAI API key
 client = OpenAI(api_key=OPENAI_API_KEY)
@@ -177,7 +183,8 @@ def summarize_pdfs(professor_dir, professor_name, logger):
             try:
                 with pdfplumber.open(pdf_filepath) as pdf:
                     text = ''
-                    for page in pdf.pages:
+                    pages = pdf.pages[:PDF_MAX_PAGES] if PDF_MAX_PAGES else pdf.pages
+                    for page in pages:
                         page_text = page.extract_text()
                         if page_text:
                             text += page_text + '\n'
@@ -196,6 +203,15 @@ def summarize_pdfs(professor_dir, professor_name, logger):
 
 def summarize_htmls(professor_dir, professor_name, logger):
     # Extract text from HTML files and save as .txt
+    summarized_filepath = os.path.join(professor_dir, 'html.summarized.txt')
+
+    # The summary is kept when no crawled page has changed since it was written
+    if os.path.exists(summarized_filepath) and os.path.exists(os.path.join(professor_dir, MANIFEST_FILENAME)):
+        manifest = CrawlManifest(professor_dir)
+        if not manifest.changed_since(int(os.path.getmtime(summarized_filepath))):
+            logger.info(f"No page of {professor_name} changed since html.summarized.txt was written; kept it")
+            return
+
     html_texts = []
     for filename in os.listdir(professor_dir):
         if filename.endswith('.html'):
@@ -203,17 +219,30 @@ def summarize_htmls(professor_dir, professor_name, logger):
             txt_filename = f"{filename}.txt"
             txt_filepath = os.path.join(professor_dir, txt_filename)
 
-            # Extract text from HTML and save as .txt
+            # The crawler writes the text of every page it saves, stamped with
+            # the hash of the page; use it when it was extracted from this page
             try:
-                with open(html_filepath, 'r', encoding='utf-8') as f:
-                    html_content = f.read()
-                    soup = BeautifulSoup(html_content, 'html.parser')
-                    # Remove unwanted elements
-                    for element in soup(["script", "style", "header", "footer", "nav", "aside", "form", "noscript"]):
-                        element.extract()
-                    text = soup.get_text(separator=' ', strip=True)
-                with open(txt_filepath, 'w', encoding='utf-8') as f:
-                    f.write(text)
+                with open(html_filepath, 'rb') as f:
+                    html_bytes = f.read()
+            except OSError as e:
+                logger.error(f"Error reading {filename}: {e}")
+                continue
+            text = page_store.read_derived_text(txt_filepath, html_bytes)
+            if text is not None:
+                html_texts.append(text)
+                logger.info(f"Using text extracted at crawl time from {txt_filename}")
+                continue
+
+            # Otherwise extract text from HTML and save as .txt
+            try:
+                soup = BeautifulSoup(html_bytes.decode('utf-8'), 'html.parser')
+                # Remove unwanted elements
+                for element in soup(["script", "style", "header", "footer", "nav", "aside", "form", "noscript"]):
+                    element.extract()
+                text = soup.get_text(separator=' ', strip=True)
+                # Replaces the file (never writes through it: an older crawl may
+                # have left it as a link into the shared page store)
+                page_store.save_derived_text(text, txt_filepath, html_bytes)
                 logger.info(f"Extracted text from {filename} and saved to {txt_filename}")
                 html_texts.append(text)
             except Exception as e:
@@ -225,7 +254,6 @@ def summarize_htmls(professor_dir, professor_name, logger):
 
     # Summarize the combined HTML text and save as 'html.summarized.txt'
     summarized_text = progressive_summarization_text(combined_html_text, professor_name, logger)
-    summarized_filepath = os.path.join(professor_dir, 'html.summarized.txt')
     with open(summarized_filepath, 'w', encoding='utf-8') as f:
         f.write(summarized_text)
     logger.info(f"Summarized HTML texts and saved to html.summarized.txt")
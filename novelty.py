@@ -0,0 +1,53 @@
+# novelty.py
+
+import re
+import threading
+from url_utils import canonicalize_url
+
+SHINGLE_SIZE = 5  # Words per shingle
+
+_word_re = re.compile(r'\w+')
+
+class NoveltyTracker:
+    # Measures how much new text each crawled page adds to what was already
+    # collected for a professor: the share of its word shingles (runs of
+    # SHINGLE_SIZE words) that no earlier page contained. Boilerplate repeated
+    # on every page of a site contributes nothing after the first page.
+
+    def __init__(self, shingle_size=SHINGLE_SIZE):
+        self.shingle_size = shingle_size
+        self._seen = set()
+        self._pages = {}
+        self._lock = threading.Lock()
+
+    def add(self, url, text):
+        # Record a page's text; returns (new shingles, total shingles)
+        shingles = self.shingles(text)
+        with self._lock:
+            new = shingles - self._seen
+            self._seen |= new
+            self._pages[canonicalize_url(url)] = (len(new), len(shingles))
+        return len(new), len(shingles)
+
+    def page_novelty(self, url):
+        # Share of new shingles on one page; None when it had no text or is unknown
+        with self._lock:
+            new, total = self._pages.get(canonicalize_url(url), (0, 0))
+        return new / total if total else None
+
+    def novelty(self, urls):
+        # Share of new shingles over a set of pages, e.g. one crawl level (0 without text)
+        new_total = total = 0
+        with self._lock:
+            for url in urls:
+                new, count = self._pages.get(canonicalize_url(url), (0, 0))
+                new_total += new
+                total += count
+        return new_total / total if total else 0.0
+
+    def shingles(self, text):
+        words = _word_re.findall(text.lower())
+        if not words:
+            return set()
+        size = min(self.shingle_size, len(words))
+        return {hash(' '.join(words[i:i + size])) for i in range(len(words) - size + 1)}
@@ -0,0 +1,162 @@
+# orcid_client.py
+
+import os
+import re
+import sqlite3
+import threading
+import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import unidecode
+import requests
+import http_client
+import config
+
+# ORCID settings (optional in config.py)
+ORCID_FETCH = getattr(config, 'ORCID_FETCH', 'works')  # 'works' (summary data_filtering uses) or 'record'
+ORCID_MAX_CANDIDATES = getattr(config, 'ORCID_MAX_CANDIDATES', 20)  # Search results checked per name
+ORCID_NEGATIVE_TTL_DAYS = getattr(config, 'ORCID_NEGATIVE_TTL_DAYS', 7)  # Re-search names without a match after this
+ORCID_CONCURRENCY = 8
+
+API_URL = 'https://pub.orcid.org/v3.0'
+HEADERS = {'Accept': 'application/json'}
+
+_cache_conn = None
+_cache_lock = threading.Lock()
+
+class LookupInconclusive(requests.RequestException):
+    # Raised when ORCID could not be fully checked (a candidate or the record
+    # could not be fetched), so "no data" is not known to be the right answer
+    pass
+
+def open_cache(project_directory):
+    # Persistent name -> ORCID iD mapping under <project_directory>/cache
+    global _cache_conn
+    with _cache_lock:
+        if _cache_conn is not None:
+            return
+        cache_dir = os.path.join(project_directory, 'cache')
+        os.makedirs(cache_dir, exist_ok=True)
+        _cache_conn = sqlite3.connect(os.path.join(cache_dir, 'orcid_ids.db'), check_same_thread=False)
+        _cache_conn.execute('''
+            CREATE TABLE IF NOT EXISTS orcid_ids (
+                "name" TEXT PRIMARY KEY,
+                "orcid_id" TEXT,
+                "looked_up_at" INTEGER
+            )
+        ''')
+        _cache_conn.commit()
+
+def fetch_orcid_data(professor_name):
+    # Returns ORCID data shaped like a /record response (only the parts that
+    # were fetched), or None when no profile matches the name exactly.
+    # Raises LookupInconclusive when that could not be established.
+    orcid_id = find_orcid_id(professor_name)
+    if not orcid_id:
+        return None
+    if ORCID_FETCH == 'record':
+        record = _get_json(f"{API_URL}/{orcid_id}/record")
+        if record is None:
+            raise LookupInconclusive(f"Could not fetch the ORCID record {orcid_id}")
+        return record
+    works = _get_json(f"{API_URL}/{orcid_id}/works")
+    if works is None:
+        raise LookupInconclusive(f"Could not fetch the works of ORCID {orcid_id}")
+    return {
+        'orcid-identifier': {'path': orcid_id},
+        'activities-summary': {'works': works},
+    }
+
+def find_orcid_id(professor_name):
+    name_key = normalize_name(professor_name)
+    cached = _cache_lookup(name_key)
+    if cached is not None:
+        return cached or None
+
+    orcid_id, conclusive = _search_orcid_id(professor_name, name_key)
+    if not (orcid_id or conclusive):
+        raise LookupInconclusive(f"Some ORCID candidates for {professor_name} could not be checked")
+    _cache_store(name_key, orcid_id or '')
+    return orcid_id
+
+def normalize_name(name):
+    name = unidecode.unidecode(name or '').lower()
+    return ' '.join(re.sub(r'[^\w\s-]', ' ', name).split())
+
+def _search_orcid_id(professor_name, name_key):
+    # Returns (orcid_id, conclusive); a "no match" is only conclusive (and
+    # cached) when every candidate could actually be checked
+    parts = professor_name.split()
+    if len(parts) >= 2:
+        query = f'given-names:"{" ".join(parts[:-1])}" AND family-name:"{parts[-1]}"'
+    else:
+        query = f'(given-names:"{professor_name}" OR family-name:"{professor_name}")'
+
+    response = http_client.get(f"{API_URL}/search/", headers=HEADERS,
+                               params={'q': query, 'rows': ORCID_MAX_CANDIDATES})
+    if response.status_code != 200:
+        print(f"ORCID API request failed with status code {response.status_code}")
+        response.raise_for_status()
+    candidates = [item['orcid-identifier']['path'] for item in (response.json().get('result') or [])]
+    if not candidates:
+        return None, True
+
+    # Check the candidates' name sections in parallel and stop at the first exact match
+    executor = ThreadPoolExecutor(max_workers=min(ORCID_CONCURRENCY, len(candidates)))
+    try:
+        futures = {executor.submit(_fetch_name, orcid_id): orcid_id for orcid_id in candidates}
+        conclusive = True
+        for future in as_completed(futures):
+            try:
+                candidate_name = future.result()
+            except requests.RequestException:
+                conclusive = False
+                continue
+            if candidate_name is None:
+                conclusive = False
+            elif candidate_name == name_key:
+                return futures[future], True
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return None, conclusive
+
+def _fetch_name(orcid_id):
+    # The personal-details section is a few hundred bytes, unlike the full record
+    details = _get_json(f"{API_URL}/{orcid_id}/personal-details")
+    if details is None:
+        return None
+    name = details.get('name') or {}
+    given_names = (name.get('given-names') or {}).get('value') or ''
+    family_name = (name.get('family-name') or {}).get('value') or ''
+    return normalize_name(f"{given_names} {family_name}")
+
+def _get_json(url):
+    response = http_client.get(url, headers=HEADERS)
+    if response.status_code != 200:
+        return None
+    return response.json()
+
+def _cache_lookup(name_key):
+    # Returns the cached iD, '' for a recent "no match", or None when unknown
+    if _cache_conn is None:
+        return None
+    with _cache_lock:
+        row = _cache_conn.execute('SELECT "orcid_id", "looked_up_at" FROM orcid_ids WHERE "name" = ?',
+                                  (name_key,)).fetchone()
+    if not row:
+        return None
+    orcid_id, looked_up_at = row
+    if not orcid_id:
+        age = datetime.datetime.now().timestamp() - looked_up_at
+        if age > ORCID_NEGATIVE_TTL_DAYS * 86400:
+            return None
+    return orcid_id
+
+def _cache_store(name_key, orcid_id):
+    if _cache_conn is None:
+        return
+    with _cache_lock:
+        _cache_conn.execute('''
+            INSERT OR REPLACE INTO orcid_ids ("name", "orcid_id", "looked_up_at")
+            VALUES (?, ?, ?)
+        ''', (name_key, orcid_id, int(datetime.datetime.now().timestamp())))
+        _cache_conn.commit()
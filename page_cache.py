@@ -0,0 +1,378 @@
+# page_cache.py
+
+import os
+import re
+import codecs
+import sqlite3
+import threading
+import datetime
+from urllib.parse import urlparse
+import requests
+import http_client
+import page_store
+import pdf_utils
+from url_utils import canonicalize_url
+import config
+
+# Conditional-GET cache settings (optional in config.py)
+HTTP_CACHE_ENABLED = getattr(config, 'HTTP_CACHE_ENABLED', True)
+
+# Download limits (optional in config.py)
+DOWNLOAD_MAX_BYTES = getattr(config, 'DOWNLOAD_MAX_BYTES', 20 * 1024 * 1024)  # Per-resource byte cap
+PDF_PARTIAL_BYTES = getattr(config, 'PDF_PARTIAL_BYTES', 1024 * 1024)  # Fetch only this head of .pdf links via Range (0 = whole file)
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+SNIFF_BYTES = 1024
+
+# Resource kinds the crawler keeps by default
+DEFAULT_ACCEPT = ('html', 'pdf')
+
+# Leading bytes of formats that are never worth downloading
+BINARY_SIGNATURES = (
+    b'\x89PNG', b'\xff\xd8\xff', b'GIF87a', b'GIF89a', b'RIFF', b'PK\x03\x04',
+    b'BM', b'ID3', b'OggS', b'fLaC', b'\x00\x00\x00', b'Rar!', b'7z\xbc\xaf', b'\xd0\xcf\x11\xe0',
+    b'wOFF', b'wOF2', b'\x00\x01\x00\x00', b'%!PS', b'FLV', b'\x1aE\xdf\xa3',
+)
+
+_charset_re = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+
+_cache_conn = None
+_cache_lock = threading.Lock()
+
+# Pages already fetched during this run, shared by every professor:
+# canonical URL -> (body_hash, encoding, content_type)
+_run_pages = {}
+# canonical URL -> (message, kind); kind is None for skips that hold for every
+# caller (the byte cap), else the resource's kind, which another caller may accept
+_run_skipped = {}
+_inflight = {}
+_run_lock = threading.Lock()
+
+class UnwantedContent(requests.RequestException):
+    # Raised when a resource is skipped because of its type (then 'kind' is
+    # that type) or size ('kind' is None)
+
+    def __init__(self, message, kind=None):
+        super().__init__(message)
+        self.kind = kind
+
+class CachedPage:
+    # Result of a cached fetch; 'changed' is False when the server answered
+    # 304 or sent back the same body that is already stored. The body stays
+    # in the page store and is only read when 'content' or 'text' is used.
+
+    def __init__(self, url, encoding, content_type, changed, body_hash=None, content=None):
+        self.url = url
+        self.encoding = encoding
+        self.content_type = content_type
+        self.changed = changed
+        self.body_hash = body_hash
+        self._content = content
+
+    @property
+    def content(self):
+        if self._content is None:
+            self._content = page_store.get(self.body_hash)
+        return self._content
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+    @property
+    def kind(self):
+        if self._content is not None:
+            head = self._content[:SNIFF_BYTES]
+        else:
+            head = page_store.read_head(self.body_hash, SNIFF_BYTES)
+        return sniff_kind(self.content_type, head)
+
+    def save_bytes(self, filepath):
+        # Write the raw body to a professor directory (a hardlink when the store is open)
+        if self.body_hash and page_store.is_open():
+            page_store.link_blob(self.body_hash, filepath)
+        else:
+            page_store.save_bytes(self.content, filepath)
+
+def open_cache(project_directory):
+    # Open (or create) the cache under <project_directory>/cache
+    global _cache_conn
+    page_store.open_store(project_directory)
+    if not HTTP_CACHE_ENABLED:
+        return
+    with _cache_lock:
+        if _cache_conn is not None:
+            return
+        cache_dir = os.path.join(project_directory, 'cache')
+        os.makedirs(cache_dir, exist_ok=True)
+        _cache_conn = sqlite3.connect(os.path.join(cache_dir, 'http_cache.db'), check_same_thread=False)
+        _cache_conn.execute('''
+            CREATE TABLE IF NOT EXISTS http_cache (
+                "url" TEXT PRIMARY KEY,
+                "etag" TEXT,
+                "last_modified" TEXT,
+                "body_hash" TEXT,
+                "encoding" TEXT,
+                "content_type" TEXT,
+                "fetched_at" INTEGER
+            )
+        ''')
+        _cache_conn.commit()
+
+def close_cache():
+    global _cache_conn
+    with _cache_lock:
+        if _cache_conn is not None:
+            _cache_conn.close()
+            _cache_conn = None
+
+def fetch(url, headers=None, accept=DEFAULT_ACCEPT):
+    # GET a page, revalidating it against the cache when an entry exists.
+    # A URL is downloaded at most once per run: later requests for it, from
+    # any professor, are served from the page store without touching the network.
+    # Only resources whose kind is in 'accept' are downloaded, streamed to disk.
+    # Raises requests.RequestException (UnwantedContent for skips) on failure.
+    if not page_store.is_open():
+        return _fetch_revalidated(url, None, headers, accept)
+
+    key = canonicalize_url(url)
+    with _run_lock:
+        run_page = _run_pages.get(key)
+        skipped = _skip_for(key, accept)
+        event = _inflight.get(key)
+        owner = run_page is None and skipped is None and event is None
+        if owner:
+            event = _inflight[key] = threading.Event()
+    if not owner and event is not None:
+        # Another worker is downloading this URL right now; reuse its result
+        event.wait()
+        with _run_lock:
+            run_page = _run_pages.get(key)
+            skipped = _skip_for(key, accept)
+        if run_page is None and skipped is None:
+            return fetch(url, headers, accept)
+    if skipped:
+        raise UnwantedContent(*skipped)
+    if run_page:
+        page = _page_from_store(url, run_page, False)
+        _check_accepted(page.kind, accept, url)
+        return page
+
+    try:
+        page = _fetch_revalidated(url, key, headers, accept)
+        with _run_lock:
+            _run_pages[key] = (page.body_hash, page.encoding, page.content_type)
+            _run_skipped.pop(key, None)
+        return page
+    except UnwantedContent as e:
+        with _run_lock:
+            _run_skipped[key] = (str(e), e.kind)
+        raise
+    finally:
+        with _run_lock:
+            del _inflight[key]
+        event.set()
+
+def _skip_for(key, accept):
+    # The recorded skip of a URL if it also applies to a caller accepting
+    # 'accept' (call with _run_lock held). A feed the crawler skipped as 'xml'
+    # is still fetched for discovery, which accepts it.
+    skipped = _run_skipped.get(key)
+    if skipped is None or (skipped[1] is not None and skipped[1] in accept):
+        return None
+    return skipped
+
+def fetched_this_run(url):
+    key = canonicalize_url(url)
+    with _run_lock:
+        return key in _run_pages or key in _run_skipped
+
+def sniff_kind(content_type, head):
+    # Classify a resource as 'html', 'pdf', 'xml', 'gzip' or 'other' from its first
+    # bytes, falling back to the Content-Type header when the bytes are inconclusive
+    if head:
+        if head.startswith(b'%PDF-'):
+            return 'pdf'
+        if head.startswith(b'\x1f\x8b'):
+            # A gzip file (e.g. sitemap.xml.gz); a gzip Content-Encoding is already undone
+            return 'gzip'
+        if head.startswith(BINARY_SIGNATURES):
+            return 'other'
+        text = head.lstrip(b'\xef\xbb\xbf \t\r\n').lower()
+        if text.startswith((b'<!doctype html', b'<html')) or b'<html' in text:
+            return 'html'
+        if text.startswith(b'<?xml') or text.startswith((b'<rss', b'<feed', b'<urlset', b'<sitemapindex')):
+            return 'xml'
+    kind = kind_from_type(content_type)
+    return kind or ('html' if head and head.lstrip().startswith(b'<') else 'other')
+
+def kind_from_type(content_type):
+    # Kind implied by the Content-Type header alone; None when the header says nothing useful
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    if not content_type or content_type in ('application/octet-stream', 'binary/octet-stream', 'application/unknown'):
+        return None
+    if 'html' in content_type:
+        return 'html'
+    if content_type == 'application/pdf' or content_type.endswith('/pdf') or content_type == 'application/x-pdf':
+        return 'pdf'
+    if 'xml' in content_type:
+        return 'xml'
+    if content_type in ('application/gzip', 'application/x-gzip'):
+        return 'gzip'
+    if content_type.startswith('text/'):
+        return None
+    return 'other'
+
+def _check_accepted(kind, accept, url):
+    if kind not in accept:
+        raise UnwantedContent(f"Skipped {kind} resource at {url}", kind)
+
+def _fetch_revalidated(url, key, headers, accept, allow_partial=True):
+    # PDF links are first asked for their leading PDF_PARTIAL_BYTES only; the
+    # head is cached under its own key, apart from any full download of the URL
+    partial = allow_partial and _wants_partial(url, accept)
+    cache_key = f"{key} bytes=0-{PDF_PARTIAL_BYTES - 1}" if partial and key else key
+    entry = _lookup(cache_key) if _cache_conn is not None and cache_key else None
+    request_headers = dict(headers or {})
+    if partial:
+        request_headers['Range'] = f"bytes=0-{PDF_PARTIAL_BYTES - 1}"
+    if entry and page_store.exists(entry['body_hash']):
+        if entry['etag']:
+            request_headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            request_headers['If-Modified-Since'] = entry['last_modified']
+    else:
+        entry = None
+
+    response = http_client.get(url, headers=request_headers, stream=True)
+    try:
+        if response.status_code == 304 and entry:
+            _touch(cache_key)
+            page = _page_from_store(url, (entry['body_hash'], entry['encoding'], entry['content_type']), False)
+            _check_accepted(page.kind, accept, url)
+            return page
+        response.raise_for_status()
+
+        content_type = response.headers.get('Content-Type', '').lower()
+        if response.status_code == 206:
+            downloaded = _download_partial_pdf(response, url, content_type)
+            if downloaded is None:
+                # Not a PDF, or its head is unreadable on its own: fetch it whole
+                response.close()
+                return _fetch_revalidated(url, key, headers, accept, allow_partial=False)
+            body_hash, content, head = downloaded
+        else:
+            # Servers without Range support answer 200 with the whole file
+            body_hash, content, head = _download(response, url, content_type, accept)
+    finally:
+        response.close()
+
+    encoding = _detect_encoding(content_type, head)
+    if _cache_conn is not None and cache_key:
+        _save(cache_key, response.headers.get('ETag'), response.headers.get('Last-Modified'),
+              body_hash, encoding, content_type)
+
+    changed = not (entry and entry['body_hash'] == body_hash)
+    return CachedPage(url, encoding, content_type, changed, body_hash, content)
+
+def _download(response, url, content_type, accept):
+    # Stream the body into the page store, rejecting unwanted kinds from the
+    # headers before any of the body is read, and from the magic bytes after
+    # the first chunk. Bodies above DOWNLOAD_MAX_BYTES are abandoned.
+    header_kind = kind_from_type(content_type)
+    if header_kind is not None and header_kind not in accept:
+        raise UnwantedContent(f"Skipped {content_type} resource at {url}", header_kind)
+    content_length = response.headers.get('Content-Length')
+    if DOWNLOAD_MAX_BYTES and content_length and content_length.isdigit() and int(content_length) > DOWNLOAD_MAX_BYTES:
+        raise UnwantedContent(f"Skipped {url}: {content_length} bytes exceeds the {DOWNLOAD_MAX_BYTES} byte cap")
+
+    writer = page_store.BlobWriter()
+    head = b''
+    try:
+        size = 0
+        for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+            if not chunk:
+                continue
+            if size == 0:
+                head = chunk[:SNIFF_BYTES]
+                _check_accepted(sniff_kind(content_type, head), accept, url)
+            size += len(chunk)
+            if DOWNLOAD_MAX_BYTES and size > DOWNLOAD_MAX_BYTES:
+                raise UnwantedContent(f"Skipped {url}: body exceeds the {DOWNLOAD_MAX_BYTES} byte cap")
+            writer.write(chunk)
+        if size == 0:
+            _check_accepted(sniff_kind(content_type, b''), accept, url)
+        body_hash, content = writer.commit()
+        return body_hash, content, head
+    except BaseException:
+        writer.abort()
+        raise
+
+def _download_partial_pdf(response, url, content_type):
+    # Read a 206 response holding the head of a PDF and make it readable on
+    # its own. Returns None when the result is not a usable PDF.
+    chunks = []
+    size = 0
+    for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= PDF_PARTIAL_BYTES:
+            break
+    content = b''.join(chunks)[:PDF_PARTIAL_BYTES]
+    if sniff_kind(content_type, content[:SNIFF_BYTES]) != 'pdf':
+        return None
+
+    # Content-Range is "bytes 0-<last>/<total>"; a short file arrives whole
+    total = response.headers.get('Content-Range', '').rsplit('/', 1)[-1]
+    if not (total.isdigit() and int(total) <= len(content)):
+        content = pdf_utils.repair_truncated(content)
+        if content is None or not pdf_utils.first_page_readable(content):
+            return None
+        print(f"Fetched the first {size} of {total or 'unknown'} bytes of {url}")
+
+    writer = page_store.BlobWriter()
+    writer.write(content)
+    body_hash, _ = writer.commit()
+    return body_hash, content, content[:SNIFF_BYTES]
+
+def _wants_partial(url, accept):
+    return bool(PDF_PARTIAL_BYTES) and 'pdf' in accept and urlparse(url).path.lower().endswith('.pdf')
+
+def _page_from_store(url, stored, changed):
+    body_hash, encoding, content_type = stored
+    return CachedPage(url, encoding, content_type, changed, body_hash)
+
+def _detect_encoding(content_type, head):
+    # Charset from the Content-Type header, then from a <meta> tag, else UTF-8
+    for source in (content_type, head.decode('ascii', errors='ignore')):
+        match = _charset_re.search(source or '')
+        if match:
+            try:
+                return codecs.lookup(match.group(1)).name
+            except LookupError:
+                continue
+    return 'utf-8'
+
+def _lookup(key):
+    with _cache_lock:
+        row = _cache_conn.execute('''
+            SELECT "etag", "last_modified", "body_hash", "encoding", "content_type"
+            FROM http_cache WHERE "url" = ?
+        ''', (key,)).fetchone()
+    if not row:
+        return None
+    return dict(zip(['etag', 'last_modified', 'body_hash', 'encoding', 'content_type'], row))
+
+def _save(key, etag, last_modified, body_hash, encoding, content_type):
+    with _cache_lock:
+        _cache_conn.execute('''
+            INSERT OR REPLACE INTO http_cache (
+                "url", "etag", "last_modified", "body_hash", "encoding", "content_type", "fetched_at"
+            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (key, etag, last_modified, body_hash, encoding, content_type, int(datetime.datetime.now().timestamp())))
+        _cache_conn.commit()
+
+def _touch(key):
+    with _cache_lock:
+        _cache_conn.execute('UPDATE http_cache SET "fetched_at" = ? WHERE "url" = ?',
+                            (int(datetime.datetime.now().timestamp()), key))
+        _cache_conn.commit()
@@ -0,0 +1,147 @@
+# page_store.py
+
+import os
+import shutil
+import hashlib
+import threading
+
+_store_dir = None
+_link_supported = True
+
+TEXT_STAMP = '# source-sha256: '
+
+def open_store(project_directory):
+    # Blobs live under <project_directory>/cache/blobs/<first two hex digits>/<sha256>
+    global _store_dir
+    _store_dir = os.path.join(project_directory, 'cache', 'blobs')
+    os.makedirs(_store_dir, exist_ok=True)
+
+def is_open():
+    return _store_dir is not None
+
+def put(content):
+    # Store bytes once, returning their hash; identical content is never written twice
+    body_hash = hashlib.sha256(content).hexdigest()
+    path = blob_path(body_hash)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    return body_hash
+
+def get(body_hash):
+    with open(blob_path(body_hash), 'rb') as f:
+        return f.read()
+
+def exists(body_hash):
+    return bool(body_hash) and os.path.exists(blob_path(body_hash))
+
+def blob_path(body_hash):
+    return os.path.join(_store_dir, body_hash[:2], body_hash)
+
+def save_text(text, filepath):
+    # Save an HTML/text artifact as UTF-8 (the encoding every reader of the data directory uses)
+    save_bytes(text.encode('utf-8'), filepath)
+
+def save_derived_text(text, filepath, source):
+    # Save text extracted from another file ('source', its bytes). Always a
+    # plain file, never a link into the store: it is rewritten whenever the
+    # source changes. The first line holds the source's SHA-256, so readers can
+    # tell whether the text still matches the file it came from.
+    tmp_path = f"{filepath}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(TEXT_STAMP + hashlib.sha256(source).hexdigest() + '\n')
+        f.write(text)
+    os.replace(tmp_path, filepath)
+
+def read_derived_text(filepath, source):
+    # The text saved by save_derived_text, if it was extracted from exactly
+    # 'source'; None when it is missing or stale
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            stamp = f.readline()
+            if stamp.rstrip('\n') != TEXT_STAMP + hashlib.sha256(source).hexdigest():
+                return None
+            return f.read()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+def save_bytes(content, filepath):
+    # Write a file into a professor directory. With the store open, the file is a
+    # hardlink to the shared blob, so pages common to a department are stored once.
+    if _store_dir is None:
+        with open(filepath, 'wb') as f:
+            f.write(content)
+        return
+    link_blob(put(content), filepath)
+
+def link_blob(body_hash, filepath):
+    global _link_supported
+    source = blob_path(body_hash)
+    if os.path.exists(filepath) and _same_file(source, filepath):
+        return
+    tmp_path = f"{filepath}.{threading.get_ident()}.tmp"
+    if _link_supported:
+        try:
+            os.link(source, tmp_path)
+            os.replace(tmp_path, filepath)
+            return
+        except OSError:
+            # Filesystem without hardlinks (or the data directory is on another device)
+            _link_supported = False
+    shutil.copyfile(source, tmp_path)
+    os.replace(tmp_path, filepath)
+
+def _same_file(path_a, path_b):
+    try:
+        return os.path.samefile(path_a, path_b)
+    except OSError:
+        return False
+
+def read_head(body_hash, size):
+    with open(blob_path(body_hash), 'rb') as f:
+        return f.read(size)
+
+class BlobWriter:
+    # Streams a download into the store chunk by chunk, hashing as it goes, so the
+    # body never has to be held in memory. Without an open store it buffers in memory.
+
+    def __init__(self):
+        self._hash = hashlib.sha256()
+        self._buffer = None
+        self._tmp_path = None
+        self._file = None
+        if _store_dir is None:
+            self._buffer = bytearray()
+        else:
+            self._tmp_path = os.path.join(_store_dir, f"incoming.{os.getpid()}.{threading.get_ident()}.tmp")
+            self._file = open(self._tmp_path, 'wb')
+
+    def write(self, chunk):
+        self._hash.update(chunk)
+        if self._file is not None:
+            self._file.write(chunk)
+        else:
+            self._buffer.extend(chunk)
+
+    def commit(self):
+        # Returns (body_hash, content); content is only returned when buffering in memory
+        body_hash = self._hash.hexdigest()
+        if self._file is None:
+            return body_hash, bytes(self._buffer)
+        self._file.close()
+        path = blob_path(body_hash)
+        if os.path.exists(path):
+            os.remove(self._tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(self._tmp_path, path)
+        return body_hash, None
+
+    def abort(self):
+        if self._file is not None:
+            self._file.close()
+            if os.path.exists(self._tmp_path):
+                os.remove(self._tmp_path)
@@ -0,0 +1,34 @@
+# pdf_utils.py
+
+import io
+import re
+import pdfplumber
+
+_catalog_re = re.compile(rb'(\d+)\s+(\d+)\s+obj\s*<<(?:(?!endobj).){0,200}?/Type\s*/Catalog', re.DOTALL)
+_object_re = re.compile(rb'(\d+)\s+(\d+)\s+obj\b')
+
+def repair_truncated(content):
+    # Turn the leading bytes of a PDF into a file PDF readers can open: cut
+    # after the last complete object and add a trailer pointing at the
+    # catalog. Readers then rebuild the object table by scanning the file
+    # and recover the pages whose objects made it into the head.
+    end = content.rfind(b'endobj')
+    if end == -1:
+        return None
+    head = content[:end + len(b'endobj')] + b'\n'
+    match = _catalog_re.search(head) or _object_re.search(head)
+    if match is None:
+        return None
+    root = b'%s %s R' % (match.group(1), match.group(2))
+    return head + b'trailer\n<< /Root ' + root + b' >>\n%%EOF\n'
+
+def first_page_readable(content):
+    # Whether a PDF opens and its first page yields to text extraction
+    try:
+        with pdfplumber.open(io.BytesIO(content)) as pdf:
+            if not pdf.pages:
+                return False
+            pdf.pages[0].extract_text()
+        return True
+    except Exception:
+        return False
@@ -0,0 +1,166 @@
+# professor_store.py
+
+import os
+import gzip
+import json
+
+STORE_DIR = 'professor_data'  # Shards of a professor's gathered data, in their data directory
+INDEX_FILE = 'index.json'
+LEGACY_FILE = 'professor_data.json'  # Single-file format written by earlier versions
+
+# Small entries kept in the index itself rather than in a shard
+INDEX_KEYS = ('source_status',)
+
+# Large list fields of a source stored in their own shard, so they can be
+# read one record at a time without loading the rest of the source
+SPLIT_FIELDS = {
+    'scholarly': ('publications',),
+}
+
+def save(professor_dir, professor_data):
+    # Write each source to its own gzip-compressed JSON lines shard (one line
+    # per record for lists), then the index describing them. Shards of
+    # sources that are no longer present are removed.
+    store_dir = os.path.join(professor_dir, STORE_DIR)
+    os.makedirs(store_dir, exist_ok=True)
+    index = {'sources': {}}
+    for key, value in professor_data.items():
+        if key in INDEX_KEYS:
+            index[key] = value
+            continue
+        if not value:
+            continue
+        entry = {}
+        if isinstance(value, dict):
+            value = dict(value)
+            for field in SPLIT_FIELDS.get(key, ()):
+                if isinstance(value.get(field), list):
+                    filename = f"{key}.{field}.jsonl.gz"
+                    entry.setdefault('fields', {})[field] = {
+                        'file': filename, 'records': _write_shard(store_dir, filename, value.pop(field))
+                    }
+        filename = f"{key}.jsonl.gz"
+        entry['kind'] = 'list' if isinstance(value, list) else 'object'
+        entry['file'] = filename
+        entry['records'] = _write_shard(store_dir, filename, value if isinstance(value, list) else [value])
+        index['sources'][key] = entry
+
+    _write_json(os.path.join(store_dir, INDEX_FILE), index)
+
+    keep = {INDEX_FILE}
+    for entry in index['sources'].values():
+        keep.add(entry['file'])
+        keep.update(field['file'] for field in entry.get('fields', {}).values())
+    for filename in os.listdir(store_dir):
+        if filename not in keep:
+            os.remove(os.path.join(store_dir, filename))
+
+    # The shards replace the single-file format
+    legacy_file = os.path.join(professor_dir, LEGACY_FILE)
+    if os.path.exists(legacy_file):
+        os.remove(legacy_file)
+    return store_dir
+
+def exists(professor_dir):
+    return (os.path.exists(os.path.join(professor_dir, STORE_DIR, INDEX_FILE))
+            or os.path.exists(os.path.join(professor_dir, LEGACY_FILE)))
+
+class ProfessorData:
+    # Read-only view of a professor's gathered data. Only the index is read
+    # up front; a source is decompressed and parsed when it is asked for,
+    # and records() streams a list one record at a time. Directories written
+    # in the old single-file format are read (whole, on first use) as well.
+
+    def __init__(self, professor_dir):
+        self.professor_dir = professor_dir
+        self.store_dir = os.path.join(professor_dir, STORE_DIR)
+        self._legacy = None
+        index_file = os.path.join(self.store_dir, INDEX_FILE)
+        if os.path.exists(index_file):
+            with open(index_file, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+        elif os.path.exists(os.path.join(professor_dir, LEGACY_FILE)):
+            self.index = None
+        else:
+            raise FileNotFoundError(f"No gathered data in '{professor_dir}'")
+
+    def sources(self):
+        if self.index is None:
+            return [key for key in self._load_legacy() if key not in INDEX_KEYS]
+        return list(self.index['sources'])
+
+    def meta(self, key, default=None):
+        # An entry kept in the index, such as 'source_status'
+        if self.index is None:
+            return self._load_legacy().get(key, default)
+        return self.index.get(key, default)
+
+    def get(self, source, default=None):
+        # The whole value of a source, as it was saved
+        if self.index is None:
+            return self._load_legacy().get(source, default)
+        entry = self.index['sources'].get(source)
+        if entry is None:
+            return default
+        records = list(self._read_shard(entry['file']))
+        if entry['kind'] == 'list':
+            return records
+        value = records[0]
+        for field, field_entry in entry.get('fields', {}).items():
+            value[field] = list(self._read_shard(field_entry['file']))
+        return value
+
+    def records(self, source, field=None):
+        # Yield the items of a list source, or of a list field of a source
+        # (e.g. records('scholarly', 'publications')); nothing if it is missing
+        if self.index is None:
+            value = self._load_legacy().get(source)
+            if field is not None:
+                value = value.get(field) if isinstance(value, dict) else None
+            if isinstance(value, list):
+                yield from value
+            return
+        entry = self.index['sources'].get(source)
+        if entry is None:
+            return
+        if field is None:
+            if entry['kind'] == 'list':
+                yield from self._read_shard(entry['file'])
+            return
+        field_entry = entry.get('fields', {}).get(field)
+        if field_entry is not None:
+            yield from self._read_shard(field_entry['file'])
+        elif entry['kind'] == 'object':
+            value = next(self._read_shard(entry['file'])).get(field)
+            if isinstance(value, list):
+                yield from value
+
+    def _read_shard(self, filename):
+        with gzip.open(os.path.join(self.store_dir, filename), 'rt', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def _load_legacy(self):
+        if self._legacy is None:
+            with open(os.path.join(self.professor_dir, LEGACY_FILE), 'r', encoding='utf-8') as f:
+                self._legacy = json.load(f)
+        return self._legacy
+
+def _write_shard(store_dir, filename, records):
+    path = os.path.join(store_dir, filename)
+    tmp_path = path + '.tmp'
+    count = 0
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, separators=(',', ':')))
+            f.write('\n')
+            count += 1
+    os.replace(tmp_path, path)
+    return count
+
+def _write_json(path, value):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(value, f, indent=4)
+    os.replace(tmp_path, path)
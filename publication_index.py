@@ -0,0 +1,204 @@
+# publication_index.py
+
+import os
+import sqlite3
+import threading
+import datetime
+import config
+
+# Publication index settings (optional in config.py)
+PUBLICATION_INDEX_ENABLED = getattr(config, 'PUBLICATION_INDEX_ENABLED', True)
+
+_conn = None
+_pid = None
+_lock = threading.Lock()
+
+def open_index(project_directory):
+    # Articles of every filtered professor live in <project_directory>/publications.db:
+    # one row per paper, its authors, the professors it was found for, and an
+    # FTS5 table over titles, abstracts and authors. Each process (filtering
+    # runs in a pool) opens its own connection.
+    global _conn, _pid
+    if not PUBLICATION_INDEX_ENABLED:
+        return None
+    with _lock:
+        if _conn is not None and _pid == os.getpid():
+            return _conn
+        _conn = sqlite3.connect(os.path.join(project_directory, 'publications.db'),
+                                timeout=30, check_same_thread=False)
+        _pid = os.getpid()
+        # Several filtering processes write at once
+        _conn.execute('PRAGMA journal_mode=WAL')
+        columns = [row[1] for row in _conn.execute('PRAGMA table_info(publications)')]
+        if columns and 'paper_key' not in columns:
+            # Index from before papers were keyed by DOI/PMID; it is rebuilt by filtering
+            for table in ('publications', 'publication_authors', 'publication_professors', 'publications_fts'):
+                _conn.execute(f'DROP TABLE IF EXISTS {table}')
+        _conn.execute('''
+            CREATE TABLE IF NOT EXISTS publications (
+                "id" INTEGER PRIMARY KEY,
+                "paper_key" TEXT UNIQUE,
+                "doi" TEXT,
+                "pmid" TEXT,
+                "title_key" TEXT,
+                "title" TEXT,
+                "year" INTEGER,
+                "abstract" TEXT,
+                "source" TEXT,
+                "updated_at" INTEGER
+            )
+        ''')
+        _conn.execute('''
+            CREATE TABLE IF NOT EXISTS publication_authors (
+                "publication_id" INTEGER,
+                "position" INTEGER,
+                "author" TEXT,
+                PRIMARY KEY ("publication_id", "position")
+            )
+        ''')
+        _conn.execute('CREATE INDEX IF NOT EXISTS publications_doi ON publications ("doi")')
+        _conn.execute('CREATE INDEX IF NOT EXISTS publications_pmid ON publications ("pmid")')
+        _conn.execute('CREATE INDEX IF NOT EXISTS publication_authors_author ON publication_authors ("author")')
+        _conn.execute('''
+            CREATE TABLE IF NOT EXISTS publication_professors (
+                "publication_id" INTEGER,
+                "professor" TEXT,
+                "is_first_author" INTEGER,
+                "is_corresponding_author" INTEGER,
+                PRIMARY KEY ("publication_id", "professor")
+            )
+        ''')
+        _conn.execute('CREATE INDEX IF NOT EXISTS publication_professors_professor ON publication_professors ("professor")')
+        _conn.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS publications_fts USING fts5(title, abstract, authors)
+        ''')
+        _conn.commit()
+        return _conn
+
+def paper_key(title_key, first_author_key, article):
+    # A paper is identified by its DOI or PMID; without either, by its title,
+    # year and first author's surname, so generic titles ("Editorial",
+    # "Introduction") of unrelated papers stay apart
+    if article.get('doi'):
+        return 'doi:' + article['doi'].lower()
+    if article.get('pmid'):
+        return 'pmid:' + article['pmid']
+    return f"title:{title_key}|{article['year'] or ''}|{first_author_key}"
+
+def index_articles(professor_name, keyed_articles):
+    # Replace the professor's links with the given (title key, first author's
+    # surname, article) triples. A paper found for several professors is
+    # stored once; its abstract, year and author list are filled in from
+    # whichever record has them.
+    if _conn is None:
+        return
+    now = int(datetime.datetime.now().timestamp())
+    with _lock, _conn:
+        _conn.execute('DELETE FROM publication_professors WHERE "professor" = ?', (professor_name,))
+        for title_key, first_author_key, article in keyed_articles:
+            if not title_key:
+                continue
+            doi = (article.get('doi') or '').lower() or None
+            pmid = article.get('pmid') or None
+            key = paper_key(title_key, first_author_key, article)
+
+            # The same paper may already be indexed under its other identifier
+            row = None
+            if doi:
+                row = _conn.execute('SELECT "id" FROM publications WHERE "doi" = ?', (doi,)).fetchone()
+            if row is None and pmid:
+                row = _conn.execute('SELECT "id" FROM publications WHERE "pmid" = ?', (pmid,)).fetchone()
+            if row is None:
+                row = _conn.execute('SELECT "id" FROM publications WHERE "paper_key" = ?', (key,)).fetchone()
+
+            if row is None:
+                publication_id = _conn.execute('''
+                    INSERT INTO publications
+                        ("paper_key", "doi", "pmid", "title_key", "title", "year", "abstract", "source", "updated_at")
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (key, doi, pmid, title_key, article['title'], article['year'], article.get('abstract', ''),
+                      article['source'], now)).lastrowid
+            else:
+                publication_id = row[0]
+                _conn.execute('''
+                    UPDATE publications SET
+                        "doi" = COALESCE("doi", ?),
+                        "pmid" = COALESCE("pmid", ?),
+                        "title" = CASE WHEN length(?) > length("title") THEN ? ELSE "title" END,
+                        "year" = COALESCE(NULLIF(?, 0), "year"),
+                        "abstract" = CASE WHEN length(?) > length("abstract") THEN ? ELSE "abstract" END,
+                        "source" = ?,
+                        "updated_at" = ?
+                    WHERE "id" = ?
+                ''', (doi, pmid, article['title'], article['title'], article['year'], article.get('abstract', ''),
+                      article.get('abstract', ''), article['source'], now, publication_id))
+
+            authors = article.get('authors', [])
+            known = _conn.execute('SELECT COUNT(*) FROM publication_authors WHERE "publication_id" = ?',
+                                  (publication_id,)).fetchone()[0]
+            if len(authors) > known:
+                _conn.execute('DELETE FROM publication_authors WHERE "publication_id" = ?', (publication_id,))
+                _conn.executemany('''
+                    INSERT INTO publication_authors ("publication_id", "position", "author") VALUES (?, ?, ?)
+                ''', [(publication_id, position, author) for position, author in enumerate(authors)])
+
+            _conn.execute('''
+                INSERT OR REPLACE INTO publication_professors
+                    ("publication_id", "professor", "is_first_author", "is_corresponding_author")
+                VALUES (?, ?, ?, ?)
+            ''', (publication_id, professor_name, article['professor_is_first_author'],
+                  article['professor_is_corresponding_author']))
+
+            title, abstract = _conn.execute('SELECT "title", "abstract" FROM publications WHERE "id" = ?',
+                                            (publication_id,)).fetchone()
+            author_names = [row[0] for row in _conn.execute('''
+                SELECT "author" FROM publication_authors WHERE "publication_id" = ? ORDER BY "position"
+            ''', (publication_id,))]
+            _conn.execute('DELETE FROM publications_fts WHERE rowid = ?', (publication_id,))
+            _conn.execute('INSERT INTO publications_fts (rowid, title, abstract, authors) VALUES (?, ?, ?, ?)',
+                          (publication_id, title, abstract, ', '.join(author_names)))
+
+def search(query, limit=20):
+    # Professors with papers matching an FTS5 query (e.g. 'rTMS' or
+    # '"deep brain" AND stimulation'), best match first:
+    # [(professor, title, year)]. Text that is not valid FTS5 syntax, such as
+    # 'deep-brain', is searched as plain terms; sqlite3.OperationalError is
+    # raised only if that fails too.
+    if _conn is None:
+        return []
+    try:
+        return _search(query, limit)
+    except sqlite3.OperationalError:
+        return _search(quote_terms(query), limit)
+
+def quote_terms(query):
+    # Each whitespace-separated term as an FTS5 string, so operators and
+    # punctuation in it are taken literally
+    return ' '.join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+def _search(query, limit):
+    with _lock:
+        return _conn.execute('''
+            SELECT pp."professor", p."title", p."year"
+            FROM publications_fts f
+            JOIN publications p ON p."id" = f.rowid
+            JOIN publication_professors pp ON pp."publication_id" = p."id"
+            WHERE publications_fts MATCH ?
+            ORDER BY bm25(publications_fts)
+            LIMIT ?
+        ''', (query, limit)).fetchall()
+
+def coauthors(professor_name):
+    # Other indexed professors who share papers with this one: [(professor, shared papers)]
+    if _conn is None:
+        return []
+    with _lock:
+        return _conn.execute('''
+            SELECT other."professor", COUNT(*) AS shared
+            FROM publication_professors mine
+            JOIN publication_professors other
+                ON other."publication_id" = mine."publication_id" AND other."professor" != mine."professor"
+            WHERE mine."professor" = ?
+            GROUP BY other."professor"
+            ORDER BY shared DESC
+        ''', (professor_name,)).fetchall()
@@ -0,0 +1,119 @@
+# pubmed_client.py
+
+import threading
+import time
+from urllib.error import HTTPError, URLError
+from Bio import Entrez
+from rate_limiter import TokenBucket
+import pubmed_xml
+import config
+
+# PubMed settings (optional in config.py, except ENTREZ_EMAIL)
+ENTREZ_EMAIL = config.ENTREZ_EMAIL
+ENTREZ_API_KEY = getattr(config, 'ENTREZ_API_KEY', None)  # Raises NCBI's limit from 3 to 10 requests/second
+PUBMED_RETMAX = getattr(config, 'PUBMED_RETMAX', 5)  # Articles per professor
+PUBMED_BATCH_WINDOW = getattr(config, 'PUBMED_BATCH_WINDOW', 0.5)  # Seconds to collect IDs from other professors
+PUBMED_BATCH_SIZE = 200  # IDs per efetch request
+PUBMED_MAX_RETRIES = 3
+
+Entrez.email = ENTREZ_EMAIL  # Required by NCBI
+if ENTREZ_API_KEY:
+    Entrez.api_key = ENTREZ_API_KEY
+
+# NCBI allows 3 requests/second per client, 10 with an API key
+_bucket = TokenBucket(rate=10 if ENTREZ_API_KEY else 3)
+
+# Pending cross-professor efetch batch; see fetch_articles()
+_batch_cond = threading.Condition()
+_current_batch = None
+_batch_window = 0
+
+def enable_batching(window=None):
+    # Let concurrent professors share efetch requests; only worth it when
+    # several professors are gathered at the same time
+    global _batch_window
+    _batch_window = PUBMED_BATCH_WINDOW if window is None else window
+
+def fetch_author_publications(professor_name, retmax=None):
+    # esearch for the author, then a single efetch for all of their IDs.
+    # Returns each article as its serialized <PubmedArticle> XML.
+    pubmed_ids = search_author(professor_name, retmax or PUBMED_RETMAX)
+    if not pubmed_ids:
+        return []
+    articles = fetch_articles(pubmed_ids)
+    return [articles[pubmed_id] for pubmed_id in pubmed_ids if pubmed_id in articles]
+
+def search_author(professor_name, retmax):
+    handle = _call(Entrez.esearch, db="pubmed", term=f'"{professor_name}"[Author]', retmax=retmax)
+    try:
+        record = Entrez.read(handle)
+    finally:
+        handle.close()
+    return list(record["IdList"])
+
+def fetch_articles(pubmed_ids):
+    # Returns {pubmed_id: article XML}. Callers arriving within the batch window
+    # join the same request, so gathering many professors at once costs one
+    # efetch per PUBMED_BATCH_SIZE IDs instead of one per professor.
+    global _current_batch
+    if not _batch_window:
+        return _efetch(pubmed_ids)
+
+    pubmed_ids = list(pubmed_ids)
+    with _batch_cond:
+        batch = _current_batch
+        leader = batch is None or len(batch['ids'] | set(pubmed_ids)) > PUBMED_BATCH_SIZE
+        if leader:
+            batch = _current_batch = {
+                'ids': set(), 'full': threading.Event(), 'done': threading.Event(),
+                'results': {}, 'error': None
+            }
+        batch['ids'].update(pubmed_ids)
+        if len(batch['ids']) >= PUBMED_BATCH_SIZE:
+            batch['full'].set()
+
+    if leader:
+        batch['full'].wait(_batch_window)
+        with _batch_cond:
+            if _current_batch is batch:
+                _current_batch = None
+        try:
+            batch['results'] = _efetch(sorted(batch['ids']))
+        except Exception as e:
+            batch['error'] = e
+        batch['done'].set()
+    else:
+        batch['done'].wait()
+
+    if batch['error'] is not None:
+        raise batch['error']
+    return {pubmed_id: batch['results'][pubmed_id] for pubmed_id in pubmed_ids if pubmed_id in batch['results']}
+
+def _efetch(pubmed_ids):
+    articles = {}
+    for i in range(0, len(pubmed_ids), PUBMED_BATCH_SIZE):
+        chunk = pubmed_ids[i:i + PUBMED_BATCH_SIZE]
+        handle = _call(Entrez.efetch, db="pubmed", id=",".join(chunk), retmode="xml")
+        try:
+            # Streamed: one <PubmedArticle> in memory at a time
+            for element in pubmed_xml.iter_articles(handle):
+                pubmed_id = element.findtext('MedlineCitation/PMID', default='')
+                if pubmed_id:
+                    articles[pubmed_id] = pubmed_xml.to_string(element)
+        finally:
+            handle.close()
+    return articles
+
+def _call(function, **kwargs):
+    # Every Entrez request waits for a token; transient errors are retried with backoff
+    delay = 1
+    for attempt in range(PUBMED_MAX_RETRIES):
+        _bucket.acquire()
+        try:
+            return function(**kwargs)
+        except (HTTPError, URLError) as e:
+            status = getattr(e, 'code', None)
+            if attempt == PUBMED_MAX_RETRIES - 1 or (status is not None and status not in (429, 500, 502, 503, 504)):
+                raise
+            time.sleep(delay)
+            delay *= 2
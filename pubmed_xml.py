@@ -0,0 +1,76 @@
+# pubmed_xml.py
+
+import os
+import xml.etree.ElementTree as ET
+
+PUBMED_XML_FILE = 'pubmed.xml'  # PubMed records of a professor, in their data directory
+
+def iter_articles(source):
+    # Yield the <PubmedArticle> elements of a PubMed XML document (a path or
+    # a binary file object) one at a time. Each element is discarded once the
+    # caller moves on, so memory stays flat however many articles there are.
+    root = None
+    for event, element in ET.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = element
+            continue
+        if element.tag == 'PubmedArticle':
+            yield element
+            root.clear()
+
+def write_articles(path, articles_xml):
+    # Save serialized <PubmedArticle> elements as one <PubmedArticleSet> document
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="utf-8"?>\n<PubmedArticleSet>\n')
+        for article_xml in articles_xml:
+            f.write(article_xml)
+            f.write('\n')
+        f.write('</PubmedArticleSet>\n')
+    os.replace(tmp_path, path)
+
+def to_string(element):
+    element.tail = None
+    return ET.tostring(element, encoding='unicode')
+
+def parse_article(element):
+    # Flatten a <PubmedArticle> element into the fields the pipeline uses
+    citation = element.find('MedlineCitation')
+    pubmed_id = citation.findtext('PMID', default='') if citation is not None else ''
+    article = citation.find('Article') if citation is not None else None
+    if article is None:
+        return {'pubmed_id': pubmed_id, 'title': '', 'authors': [], 'year': '', 'abstract': '', 'affiliations': []}
+
+    title = ''.join(article.find('ArticleTitle').itertext()).strip() if article.find('ArticleTitle') is not None else ''
+    abstract_parts = []
+    for part in article.findall('Abstract/AbstractText'):
+        text = ''.join(part.itertext()).strip()
+        label = part.get('Label')
+        abstract_parts.append(f"{label}: {text}" if label else text)
+
+    authors = []
+    affiliations = []
+    for author in article.findall('AuthorList/Author'):
+        name = f"{author.findtext('ForeName', default='')} {author.findtext('LastName', default='')}".strip()
+        if not name:
+            name = author.findtext('CollectiveName', default='').strip()
+        if name:
+            authors.append(name)
+        for affiliation in author.findall('AffiliationInfo/Affiliation'):
+            text = ''.join(affiliation.itertext()).strip()
+            if text and text not in affiliations:
+                affiliations.append(text)
+
+    year = article.findtext('Journal/JournalIssue/PubDate/Year', default='')
+    if not year:
+        year = article.findtext('Journal/JournalIssue/PubDate/MedlineDate', default='')[:4]
+
+    return {
+        'pubmed_id': pubmed_id,
+        'title': title,
+        'authors': authors,
+        'year': year,
+        'abstract': '\n'.join(abstract_parts),
+        'affiliations': affiliations,
+    }
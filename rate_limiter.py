@@ -0,0 +1,97 @@
+# rate_limiter.py
+
+import threading
+import time
+
+class TokenBucket:
+    # Classic token bucket: 'rate' tokens per second, bursts of up to 'capacity'.
+    # acquire() blocks the calling thread only, until a token is available.
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait_time = (tokens - self._tokens) / self.rate
+            time.sleep(wait_time)
+
+    def set_rate(self, rate):
+        with self._lock:
+            self.rate = float(rate)
+
+class HostRateLimiter:
+    # One token bucket per host, so requests to different universities never
+    # wait on each other. A host that answers 429/503 is paused (for its
+    # Retry-After when given) and slowed down, then sped up again on success.
+
+    def __init__(self, rate, burst=None, overrides=None, min_rate=0.05, max_backoff=120):
+        self.rate = rate
+        self.burst = burst
+        self.overrides = overrides or {}
+        self.min_rate = min_rate
+        self.max_backoff = max_backoff
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _state(self, host):
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                rate = self.overrides.get(host, self.rate)
+                state = self._hosts[host] = {
+                    'bucket': TokenBucket(rate, self.burst),
+                    'max_rate': rate,
+                    'blocked_until': 0.0,
+                    'backoff': 1.0,
+                }
+            return state
+
+    def acquire(self, host):
+        state = self._state(host)
+        while True:
+            wait_time = state['blocked_until'] - time.monotonic()
+            if wait_time <= 0:
+                break
+            time.sleep(wait_time)
+        state['bucket'].acquire()
+
+    def set_crawl_delay(self, host, delay):
+        # robots.txt Crawl-delay caps the host's rate for the rest of the run
+        if not delay or delay <= 0:
+            return
+        state = self._state(host)
+        with self._lock:
+            state['max_rate'] = min(state['max_rate'], 1.0 / delay)
+            rate = min(state['bucket'].rate, state['max_rate'])
+        state['bucket'].set_rate(rate)
+
+    def throttle(self, host, retry_after=None):
+        state = self._state(host)
+        with self._lock:
+            delay = retry_after if retry_after is not None else state['backoff']
+            delay = min(delay, self.max_backoff)
+            state['blocked_until'] = max(state['blocked_until'], time.monotonic() + delay)
+            state['backoff'] = min(state['backoff'] * 2, self.max_backoff)
+            rate = max(self.min_rate, state['bucket'].rate / 2)
+        state['bucket'].set_rate(rate)
+        return delay
+
+    def success(self, host):
+        state = self._state(host)
+        with self._lock:
+            state['backoff'] = 1.0
+            if state['bucket'].rate >= state['max_rate']:
+                return
+            rate = min(state['max_rate'], state['bucket'].rate * 1.5)
+        state['bucket'].set_rate(rate)
@@ -0,0 +1,84 @@
+# relevance.py
+
+import re
+from functools import lru_cache
+import numpy as np
+
+RECENCY_HORIZON = 10  # Years over which the recency score falls from 1 to 0
+
+_word_re = re.compile(r'[a-z][a-z0-9\-]{2,}')
+STOP_WORDS = frozenset('''
+    and are but for from has have into its not our that the their these this those was were which while
+    with within without using use used based via between among study studies analysis results paper
+    new novel approach method methods data effect effects role case also can may than been being
+'''.split())
+
+@lru_cache(maxsize=8)
+def load_text(path):
+    # The CV is read once per process, however many professors are ranked against it
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def tokenize(text):
+    return [word for word in _word_re.findall((text or '').lower()) if word not in STOP_WORDS]
+
+def relevance_scores(documents, query):
+    # Cosine similarity between the TF-IDF vector of each document and of
+    # the query. IDF is computed over the documents and the query together,
+    # so words common to all of a professor's articles carry little weight.
+    token_lists = [tokenize(document) for document in documents]
+    query_tokens = tokenize(query)
+    vocabulary = {}
+    for tokens in token_lists + [query_tokens]:
+        for token in tokens:
+            vocabulary.setdefault(token, len(vocabulary))
+    if not documents or not vocabulary:
+        return np.zeros(len(documents))
+
+    counts = np.zeros((len(documents) + 1, len(vocabulary)))
+    for row, tokens in enumerate(token_lists + [query_tokens]):
+        for token in tokens:
+            counts[row, vocabulary[token]] += 1
+
+    document_frequency = np.count_nonzero(counts, axis=0)
+    idf = np.log((1 + counts.shape[0]) / (1 + document_frequency)) + 1
+    weights = np.log1p(counts) * idf
+    norms = np.linalg.norm(weights, axis=1)
+    norms[norms == 0] = 1
+    weights /= norms[:, None]
+    return weights[:-1] @ weights[-1]
+
+def recency_scores(years, current_year, horizon=RECENCY_HORIZON):
+    # 1 for this year's articles, falling linearly to 0 at 'horizon' years;
+    # articles without a year get the middle score
+    scores = []
+    for year in years:
+        if not year:
+            scores.append(0.5)
+        else:
+            scores.append(max(0.0, 1 - max(0, current_year - year) / horizon))
+    return np.array(scores)
+
+def rank_articles(articles, cv_text, current_year, top_k=None, recency_weight=0.3):
+    # Order articles by a blend of relevance to the CV (scaled so the most
+    # relevant article scores 1) and recency, and keep the top_k best. Each
+    # returned article gets its 'relevance' (cosine similarity to the CV).
+    if not articles:
+        return []
+    documents = [f"{article['title']} {article.get('abstract', '')}" for article in articles]
+    relevance = relevance_scores(documents, cv_text)
+    top = relevance.max()
+    scaled = relevance / top if top > 0 else relevance
+    scores = (1 - recency_weight) * scaled + recency_weight * recency_scores(
+        [article['year'] for article in articles], current_year)
+
+    # Stable sort, so ties keep the incoming (newest first) order
+    order = np.argsort(-scores, kind='stable')
+    if top_k:
+        order = order[:top_k]
+    ranked = []
+    for index in order:
+        article = dict(articles[index])
+        article['relevance'] = round(float(relevance[index]), 4)
+        ranked.append(article)
+    return ranked
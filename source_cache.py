@@ -0,0 +1,131 @@
+# source_cache.py
+
+import os
+import re
+import json
+import zlib
+import sqlite3
+import threading
+import datetime
+import config
+
+# Source cache settings (optional in config.py)
+SOURCE_CACHE_ENABLED = getattr(config, 'SOURCE_CACHE_ENABLED', True)
+SOURCE_CACHE_TTL_DAYS = getattr(config, 'SOURCE_CACHE_TTL_DAYS', {
+    'scholarly': 30,
+    'serpapi': 30,
+    'entrez': 14,
+    'crossref': 14,
+    'orcid': 30,
+})
+SOURCE_CACHE_DEFAULT_TTL_DAYS = 14
+SOURCE_CACHE_NEGATIVE_TTL_DAYS = getattr(config, 'SOURCE_CACHE_NEGATIVE_TTL_DAYS', 7)  # Ask again after this when a source had nothing
+SOURCE_CACHE_MAX_BYTES = getattr(config, 'SOURCE_CACHE_MAX_BYTES', 512 * 1024 * 1024)  # Evict least recently used above this
+
+_conn = None
+_lock = threading.Lock()
+
+def open_cache(project_directory):
+    # Cached responses live in <project_directory>/cache/source_cache.db
+    global _conn
+    if not SOURCE_CACHE_ENABLED:
+        return
+    with _lock:
+        if _conn is not None:
+            return
+        cache_dir = os.path.join(project_directory, 'cache')
+        os.makedirs(cache_dir, exist_ok=True)
+        _conn = sqlite3.connect(os.path.join(cache_dir, 'source_cache.db'), check_same_thread=False)
+        _conn.execute('''
+            CREATE TABLE IF NOT EXISTS source_cache (
+                "source" TEXT,
+                "query" TEXT,
+                "value" BLOB,
+                "size" INTEGER,
+                "stored_at" INTEGER,
+                "accessed_at" INTEGER,
+                PRIMARY KEY ("source", "query")
+            )
+        ''')
+        _conn.execute('CREATE INDEX IF NOT EXISTS source_cache_accessed ON source_cache ("accessed_at")')
+        _conn.execute('''
+            CREATE TABLE IF NOT EXISTS source_cache_stats (
+                "source" TEXT PRIMARY KEY,
+                "hits" INTEGER DEFAULT 0,
+                "misses" INTEGER DEFAULT 0
+            )
+        ''')
+        _conn.commit()
+
+def normalize_query(query):
+    return ' '.join(re.sub(r'[^\w\s]', ' ', str(query).lower()).split())
+
+def get(source, query):
+    # Returns (hit, value). A hit can carry None: the source was asked and had
+    # nothing. Such answers expire after SOURCE_CACHE_NEGATIVE_TTL_DAYS.
+    if _conn is None:
+        return False, None
+    key = normalize_query(query)
+    now = int(datetime.datetime.now().timestamp())
+    ttl_days = SOURCE_CACHE_TTL_DAYS.get(source, SOURCE_CACHE_DEFAULT_TTL_DAYS)
+    with _lock:
+        row = _conn.execute('SELECT "value", "stored_at" FROM source_cache WHERE "source" = ? AND "query" = ?',
+                            (source, key)).fetchone()
+        value = json.loads(zlib.decompress(row[0]).decode('utf-8')) if row is not None else None
+        if value is None:
+            ttl_days = min(ttl_days, SOURCE_CACHE_NEGATIVE_TTL_DAYS)
+        hit = row is not None and now - row[1] <= ttl_days * 86400
+        if hit:
+            _conn.execute('UPDATE source_cache SET "accessed_at" = ? WHERE "source" = ? AND "query" = ?',
+                          (now, source, key))
+        elif row is not None:
+            _conn.execute('DELETE FROM source_cache WHERE "source" = ? AND "query" = ?', (source, key))
+        _record(source, hit)
+        _conn.commit()
+    if not hit:
+        return False, None
+    return True, value
+
+def put(source, query, value):
+    if _conn is None:
+        return
+    try:
+        blob = zlib.compress(json.dumps(value).encode('utf-8'))
+    except (TypeError, ValueError):
+        # Not JSON-serializable; leave it uncached
+        return
+    now = int(datetime.datetime.now().timestamp())
+    with _lock:
+        _conn.execute('''
+            INSERT OR REPLACE INTO source_cache ("source", "query", "value", "size", "stored_at", "accessed_at")
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (source, normalize_query(query), blob, len(blob), now, now))
+        _evict()
+        _conn.commit()
+
+def stats():
+    # {source: (hits, misses)} accumulated across runs
+    if _conn is None:
+        return {}
+    with _lock:
+        rows = _conn.execute('SELECT "source", "hits", "misses" FROM source_cache_stats').fetchall()
+    return {source: (hits, misses) for source, hits, misses in rows}
+
+def _record(source, hit):
+    column = 'hits' if hit else 'misses'
+    _conn.execute('INSERT OR IGNORE INTO source_cache_stats ("source") VALUES (?)', (source,))
+    _conn.execute(f'UPDATE source_cache_stats SET "{column}" = "{column}" + 1 WHERE "source" = ?', (source,))
+
+def _evict():
+    # Drop least recently used entries until the cache fits SOURCE_CACHE_MAX_BYTES
+    if not SOURCE_CACHE_MAX_BYTES:
+        return
+    total = _conn.execute('SELECT COALESCE(SUM("size"), 0) FROM source_cache').fetchone()[0]
+    if total <= SOURCE_CACHE_MAX_BYTES:
+        return
+    rows = _conn.execute('SELECT "source", "query", "size" FROM source_cache ORDER BY "accessed_at"').fetchall()
+    for source, query, size in rows:
+        if total <= SOURCE_CACHE_MAX_BYTES:
+            break
+        _conn.execute('DELETE FROM source_cache WHERE "source" = ? AND "query" = ?', (source, query))
+        total -= size
@@ -0,0 +1,35 @@
+# url_utils.py
+
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+# Query parameters that only track the visitor and never change the page
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', 'igshid',
+    '_ga', '_gl', 'ref', 'ref_src', 'share', 'sessionid', 'phpsessid', 'jsessionid'
+}
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+def canonicalize_url(url):
+    # Normalize a URL so that equivalent spellings map to the same key:
+    # lowercase scheme/host, no default port, no fragment, no tracking
+    # parameters, sorted query and no trailing slash (except for the root)
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or '').lower()
+    port = parsed.port if parsed.port and parsed.port != DEFAULT_PORTS.get(scheme) else None
+    netloc = f"{host}:{port}" if port else host
+    if parsed.username:
+        netloc = f"{parsed.username}@{netloc}"
+
+    path = parsed.path or '/'
+    if len(path) > 1:
+        path = path.rstrip('/') or '/'
+
+    query_pairs = [
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith('utm_')
+    ]
+    query = urlencode(sorted(query_pairs))
+
+    return urlunparse((scheme, netloc, path, parsed.params, query, ''))